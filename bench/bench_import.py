@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+DEFAULT_MODULES = "markdown_parser,site_generator,render_daemon,main"
+
+
+def import_times(module, pycache):
+    # Runs `python -X importtime -c "import module"` in a fresh interpreter
+    # and returns {imported module: (self_us, cumulative_us)}. Bytecode goes
+    # to the pycache directory so compiling the sources is not measured.
+    environment = dict(os.environ)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    completed = subprocess.run(
+        [sys.executable, "-X", f"pycache_prefix={pycache}", "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, cwd=SRC_DIR, env=environment,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def measure(module, repeat, top, pycache):
+    import_times(module, pycache)
+    runs = [import_times(module, pycache) for _ in range(repeat)]
+    totals = [run[module][1] for run in runs]
+    best = runs[totals.index(min(totals))]
+    heaviest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "module": module,
+        "best_ms": min(totals) / 1000,
+        "median_ms": statistics.median(totals) / 1000,
+        "imported_modules": len(best),
+        "heaviest_self_ms": {name: self_us / 1000 for name, (self_us, _) in heaviest},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time of the entry modules, from python -X importtime")
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="comma separated modules to import")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports listed per module")
+    parser.add_argument("--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    results = []
+    with tempfile.TemporaryDirectory() as pycache:
+        for module in args.modules.split(","):
+            results.append(measure(module, args.repeat, args.top, pycache))
+            print(f"{module:>16} {results[-1]['best_ms']:.1f}ms", file=sys.stderr)
+    report = {"python": sys.version.split()[0], "repeat": args.repeat, "results": results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from markdown_parser import markdown_to_html_node
+
+from corpus import CORPUS_KINDS, generate
+
+def measure(markdown):
+    megabytes = len(markdown.encode()) / (1024 * 1024)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    node = markdown_to_html_node(markdown)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    del node
+
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    live = snapshot.statistics("filename")
+    live_blocks = sum(stat.count for stat in live)
+    live_bytes = sum(stat.size for stat in live)
+    del node
+    return {
+        "input_mb": round(megabytes, 3),
+        "peak_rss_delta_kb": rss_after - rss_before,
+        "traced_peak_kb_per_mb": round(peak / 1024 / megabytes, 1),
+        "live_allocations_per_mb": round(live_blocks / megabytes),
+        "live_kb_per_mb": round(live_bytes / 1024 / megabytes, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory use of markdown_to_html_node")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="markdown size in bytes")
+    parser.add_argument("--kind", default="dense_inline", choices=sorted(CORPUS_KINDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(generate(args.kind, args.size, args.seed)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
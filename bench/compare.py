@@ -0,0 +1,36 @@
+import argparse
+import json
+
+
+def load_results(path):
+    with open(path) as report_file:
+        report = json.load(report_file)
+    return {(result["corpus"], result["size"]): result["stages"] for result in report["results"]}
+
+def compare(baseline_path, candidate_path, threshold):
+    baseline = load_results(baseline_path)
+    candidate = load_results(candidate_path)
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        for stage, timing in baseline[key].items():
+            if stage not in candidate[key] or not timing["best_s"]:
+                continue
+            ratio = candidate[key][stage]["best_s"] / timing["best_s"]
+            marker = ""
+            if ratio > 1 + threshold:
+                marker = "  REGRESSION"
+                regressions += 1
+            print(f"{key[0]:>12} {key[1]:>10}B {stage:>22} {ratio:6.2f}x{marker}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two run_bench.py JSON reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+    raise SystemExit(1 if compare(args.baseline, args.candidate, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import random
+
+WORDS = [
+    "static", "site", "node", "markdown", "render", "tree", "block", "inline",
+    "page", "build", "parser", "template", "output", "cache", "stream", "index",
+]
+
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 * 1024}
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    for unit in ("KB", "MB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(text)
+
+def _words(rng, count):
+    return [rng.choice(WORDS) for _ in range(count)]
+
+def dense_inline_block(rng):
+    words = _words(rng, 40)
+    for i in range(0, len(words), 8):
+        words[i] = f"**{words[i]}**"
+        words[i + 2] = f"_{words[i + 2]}_"
+        words[i + 4] = f"`{words[i + 4]}`"
+        words[i + 6] = f"[{words[i + 6]}](https://example.com/{rng.randrange(1000)})"
+    return " ".join(words)
+
+def long_list_block(rng):
+    if rng.random() < 0.5:
+        return "\n".join(f"- {' '.join(_words(rng, 6))}" for _ in range(200))
+    return "\n".join(f"{i}. {' '.join(_words(rng, 6))}" for i in range(1, 201))
+
+def code_block(rng):
+    lines = [f"    {rng.choice(WORDS)}_{i} = render({rng.choice(WORDS)!r}, {i})" for i in range(500)]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+def deep_quote_block(rng):
+    return "\n".join(
+        f"{'>' * rng.randint(1, 6)} {' '.join(_words(rng, 10))}" for _ in range(30)
+    )
+
+def link_heavy_block(rng):
+    return " ".join(
+        f"[{rng.choice(WORDS)}](/{rng.choice(WORDS)}/{rng.randrange(10000)}.html)" for _ in range(300)
+    )
+
+def prose_block(rng):
+    return "\n".join(" ".join(_words(rng, 12)) for _ in range(4))
+
+def heading_block(rng):
+    return f"{'#' * rng.randint(1, 6)} {' '.join(_words(rng, 4))}"
+
+CORPUS_KINDS = {
+    "dense_inline": dense_inline_block,
+    "long_lists": long_list_block,
+    "code_blocks": code_block,
+    "deep_quotes": deep_quote_block,
+    "link_heavy": link_heavy_block,
+    "prose": prose_block,
+}
+
+def generate(kind, size, seed=0):
+    if kind not in CORPUS_KINDS:
+        raise ValueError(f"Unknown corpus kind: {kind}")
+    make_block = CORPUS_KINDS[kind]
+    rng = random.Random(f"{kind}:{seed}")
+    blocks = []
+    total = 0
+    while total < size:
+        block = heading_block(rng) if len(blocks) % 20 == 0 else make_block(rng)
+        blocks.append(block)
+        total += len(block) + 2
+    return "\n\n".join(blocks)
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from block_types import markdown_to_blocks, parse_block
+from markdown_parser import markdown_to_html_node, plain_paragraph_node
+from textnode import INLINE_ENGINES, SPAN_WIDTH, scan_inline_spans, spans_to_html, text_to_textnodes
+
+from corpus import CORPUS_KINDS, generate, parse_size
+
+DEFAULT_SIZES = "1KB,100KB,1MB"
+# The stages markdown_to_html_node runs, in order: plain paragraphs skip
+# parsing and span scanning, every other block's inline texts are scanned into
+# spans and emitted as HTML, and to_html joins the result.
+STAGES = ["markdown_to_blocks", "parse_block", "scan_inline_spans", "spans_to_html", "to_html", "total"]
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+def run_stages(markdown, repeat, engines):
+    blocks, timings = timed(lambda: markdown_to_blocks(markdown), repeat)
+    stage_timings = {"markdown_to_blocks": timings}
+    marked_blocks = [block for block in blocks if plain_paragraph_node(block) is None]
+    parsed_blocks, stage_timings["parse_block"] = timed(
+        lambda: [parse_block(block) for block in marked_blocks], repeat
+    )
+    texts = [text.replace("\n", " ") for parsed in parsed_blocks for text in parsed.inline_texts()]
+    spans, stage_timings["scan_inline_spans"] = timed(lambda: [scan_inline_spans(text) for text in texts], repeat)
+    _, stage_timings["spans_to_html"] = timed(
+        lambda: [spans_to_html(text, text_spans) for text, text_spans in zip(texts, spans)], repeat
+    )
+    tree = markdown_to_html_node(markdown)
+    _, stage_timings["to_html"] = timed(tree.to_html, repeat)
+    _, stage_timings["total"] = timed(lambda: markdown_to_html_node(markdown).to_html(), repeat)
+    # Not part of the render pipeline, but the link, TOC and search collectors
+    # build TextNodes through text_to_textnodes; each engine is timed on the
+    # same texts so they can be compared.
+    engine_timings = {}
+    for engine in engines:
+        _, engine_timings[engine] = timed(
+            lambda: [text_to_textnodes(text, engine=engine, use_cache=False) for text in texts], repeat
+        )
+    counts = {
+        "blocks": len(blocks),
+        "plain_paragraphs": len(blocks) - len(marked_blocks),
+        "inline_texts": len(texts),
+        "spans": sum(len(text_spans) for text_spans in spans) // SPAN_WIDTH,
+    }
+    return stage_timings, engine_timings, counts
+
+def summarize(timings, size):
+    best = min(timings)
+    return {
+        "best_s": best,
+        "median_s": statistics.median(timings),
+        "mb_per_s": size / (1024 * 1024) / best if best else None,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(kinds, sizes, repeat, seed, engines):
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            markdown = generate(kind, size, seed)
+            stage_timings, engine_timings, counts = run_stages(markdown, repeat, engines)
+            results.append({
+                "corpus": kind,
+                "size": len(markdown.encode()),
+                "counts": counts,
+                "stages": {stage: summarize(stage_timings[stage], len(markdown.encode())) for stage in STAGES},
+                "engines": {
+                    engine: summarize(timings, len(markdown.encode())) for engine, timings in engine_timings.items()
+                },
+            })
+            print(f"{kind:>12} {size:>10}B total {results[-1]['stages']['total']['best_s']:.4f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "seed": seed,
+            "engines": engines,
+        },
+        "results": results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage timings of the markdown to HTML pipeline")
+    parser.add_argument("--kinds", default=",".join(CORPUS_KINDS), help="comma separated corpus kinds")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated sizes, e.g. 1KB,1MB,100MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--engines", default=",".join(INLINE_ENGINES), help="comma separated inline engines to time text_to_textnodes with",
+    )
+    parser.add_argument("--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    report = run(
+        args.kinds.split(","),
+        [parse_size(size) for size in args.sizes.split(",")],
+        args.repeat,
+        args.seed,
+        args.engines.split(","),
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-python3 src/main.py
\ No newline at end of file
+cd "$(dirname "$0")" && python3 src/main.py build --content content --template template.html --out public "$@"
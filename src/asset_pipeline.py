@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from dependency_graph import asset_stamp, resolve_target
+from grammar import find_images
+from output_writer import atomic_write
+
+ASSET_MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as asset_file:
+        for chunk in iter(lambda: asset_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hashed_name(asset, digest):
+    root, extension = posixpath.splitext(asset)
+    return f"{root}.{digest[:HASH_LENGTH]}{extension}"
+
+def find_page_images(markdown):
+    if "![" not in markdown:
+        return []
+    return [match.group(2) for match in find_images(markdown.replace("\n", " "))]
+
+def page_image_urls(page, markdown, asset_urls):
+    # Maps every image url written in the page to its published url.
+    url_map = {}
+    for url in find_page_images(markdown):
+        asset = resolve_target(page, url, is_page_link=False)
+        if asset in asset_urls:
+            url_map[url] = asset_urls[asset]
+    return url_map
+
+def publish_file(source, target, hardlink=False):
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{target}.tmp"
+    if hardlink:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+    else:
+        shutil.copy2(source, temp_path)
+    os.replace(temp_path, target)
+
+
+class AssetPipeline:
+    def __init__(self, content_dir, out_dir, manifest_path=None, workers=8, hardlink=False):
+        self.content_dir = content_dir
+        self.out_dir = out_dir
+        self.manifest_path = manifest_path
+        self.workers = workers
+        self.hardlink = hardlink
+        self.assets = set()
+        self.entries = {}
+        self.copied = []
+        self.unchanged = []
+        self.missing = []
+        if manifest_path and os.path.exists(manifest_path):
+            self.load()
+
+    def collect(self, page, markdown):
+        for url in find_page_images(markdown):
+            asset = resolve_target(page, url, is_page_link=False)
+            if asset is not None and not asset.startswith("../"):
+                self.assets.add(asset)
+
+    def publish_asset(self, asset):
+        # Returns the manifest entry for asset, or None when it is missing,
+        # and whether a file had to be copied.
+        stamp = asset_stamp(self.content_dir, asset)
+        if stamp is None:
+            return None, False
+        entry = self.entries.get(asset)
+        if entry is not None and entry["stamp"] == stamp and os.path.exists(os.path.join(self.out_dir, entry["output"])):
+            return entry, False
+        source = os.path.join(self.content_dir, asset)
+        output = hashed_name(asset, file_hash(source))
+        target = os.path.join(self.out_dir, output)
+        copied = not os.path.exists(target)
+        if copied:
+            publish_file(source, target, self.hardlink)
+        return {"stamp": stamp, "output": output}, copied
+
+    def publish(self):
+        # Older hashed copies stay in place: pages that were not re-rendered
+        # may still point at them.
+        assets = sorted(self.assets)
+        entries = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for asset, (entry, copied) in zip(assets, executor.map(self.publish_asset, assets)):
+                if entry is None:
+                    self.missing.append(asset)
+                    continue
+                entries[asset] = entry
+                (self.copied if copied else self.unchanged).append(asset)
+        self.entries = entries
+        if self.manifest_path:
+            self.save()
+        return {asset: "/" + entry["output"] for asset, entry in entries.items()}
+
+    def load(self):
+        with open(self.manifest_path, encoding="utf-8") as manifest_file:
+            try:
+                data = json.load(manifest_file)
+            except json.JSONDecodeError:
+                return
+        if data.get("version") == ASSET_MANIFEST_VERSION:
+            self.entries = data["assets"]
+
+    def save(self):
+        atomic_write(self.manifest_path, json.dumps({"version": ASSET_MANIFEST_VERSION, "assets": self.entries}))
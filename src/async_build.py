@@ -0,0 +1,138 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from block_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, BlockCache
+from output_writer import OutputWriter
+from site_generator import find_pages, page_output_path, render_page
+from template import Template
+
+
+_worker_state = {}
+
+
+def read_text(path):
+    with open(path, encoding="utf-8") as text_file:
+        return text_file.read()
+
+def _init_parse_worker(template, cache_path, cache_limits, slots):
+    _worker_state["template"] = template
+    _worker_state["cache"] = BlockCache(cache_path, *cache_limits, track_new=True) if cache_path else None
+    _worker_state["slots"] = slots
+
+def _render_in_worker(markdown):
+    # Returns the page with the cache entries, hits and misses it added, for
+    # the parent's cache to merge.
+    cache = _worker_state["cache"]
+    if cache is None:
+        return render_page(markdown, _worker_state["template"], slots=_worker_state["slots"]), [], 0, 0
+    hits, misses = cache.hits, cache.misses
+    html = render_page(markdown, _worker_state["template"], cache, slots=_worker_state["slots"])
+    return html, cache.pop_new_entries(), cache.hits - hits, cache.misses - misses
+
+async def _run_stage(inbox, outbox, workers, handle):
+    # Runs `workers` consumers over inbox; each stops at its own None. The
+    # bounded queues make a fast stage wait for a slow one downstream.
+    async def consume():
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            result = await handle(item)
+            if outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(consume() for _ in range(workers)))
+
+async def _feed(queue, items, consumers):
+    for item in items:
+        await queue.put(item)
+    for _ in range(consumers):
+        await queue.put(None)
+
+async def build_site_async(
+    content_dir, template, out_dir, readers=8, parse_workers=1, writers=8, queue_size=32, cache_path=None,
+    manifest_path=None, slots=None, cache_max_entries=DEFAULT_MAX_ENTRIES, cache_max_bytes=DEFAULT_MAX_BYTES,
+):
+    if min(readers, parse_workers, writers, queue_size) < 1:
+        raise ValueError("readers, parse_workers, writers and queue_size must be at least 1")
+    loop = asyncio.get_running_loop()
+    io_executor = ThreadPoolExecutor(max_workers=readers + writers)
+    parse_executor = None
+    cache = BlockCache(cache_path, cache_max_entries, cache_max_bytes) if cache_path else None
+    # The writer's own thread pool is unused; its writes run on io_executor.
+    writer = OutputWriter(out_dir, manifest_path, workers=0)
+    written = []
+
+    async def read(page):
+        markdown = await loop.run_in_executor(io_executor, read_text, os.path.join(content_dir, page))
+        return page, markdown
+
+    async def parse(item):
+        page, markdown = item
+        if parse_workers == 1:
+            html = await loop.run_in_executor(parse_executor, render_page, markdown, template_html, cache, (), slots)
+        else:
+            html, entries, hits, misses = await loop.run_in_executor(parse_executor, _render_in_worker, markdown)
+            if cache is not None:
+                cache.merge(entries, hits, misses)
+        return page_output_path(page, out_dir), html
+
+    async def write(item):
+        path, html = item
+        await loop.run_in_executor(io_executor, writer.write, path, html)
+        written.append(path)
+
+    try:
+        template_html = Template(await loop.run_in_executor(io_executor, read_text, template))
+        pages = await loop.run_in_executor(io_executor, find_pages, content_dir)
+        # Parsing is CPU bound: a process pool when several workers are asked
+        # for, each with its own cache merged back here; otherwise one thread
+        # sharing the cache.
+        if parse_workers > 1:
+            parse_executor = ProcessPoolExecutor(
+                max_workers=parse_workers, initializer=_init_parse_worker,
+                initargs=(template_html, cache_path, (cache_max_entries, cache_max_bytes), slots),
+            )
+        else:
+            parse_executor = ThreadPoolExecutor(max_workers=1)
+        page_queue = asyncio.Queue(queue_size)
+        parse_queue = asyncio.Queue(queue_size)
+        write_queue = asyncio.Queue(queue_size)
+
+        async def read_stage():
+            await _run_stage(page_queue, parse_queue, readers, read)
+            await _feed(parse_queue, (), parse_workers)
+
+        async def parse_stage():
+            await _run_stage(parse_queue, write_queue, parse_workers, parse)
+            await _feed(write_queue, (), writers)
+
+        tasks = [
+            asyncio.ensure_future(_feed(page_queue, pages, readers)),
+            asyncio.ensure_future(read_stage()),
+            asyncio.ensure_future(parse_stage()),
+            asyncio.ensure_future(_run_stage(write_queue, None, writers, write)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    finally:
+        io_executor.shutdown(wait=True)
+        if parse_executor is not None:
+            parse_executor.shutdown(wait=True)
+    writer.close()
+
+    result = {"pages": len(written), "written": written, "unchanged": sorted(writer.unchanged)}
+    if cache is not None:
+        cache.save()
+        result["cache"] = cache.stats()
+        result["cache_report"] = cache.report()
+    return result
+
+def build_site(content_dir, template, out_dir, **options):
+    return asyncio.run(build_site_async(content_dir, template, out_dir, **options))
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Bump whenever the rendered HTML for an unchanged block could differ.
+CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class BlockCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, track_new=False):
+        # track_new remembers the keys put since the last pop_new_entries, so
+        # pool workers can send their additions back; long-lived caches leave
+        # it off.
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.track_new = track_new
+        self.new_keys = []
+        if path and os.path.exists(path):
+            self.load()
+
+    def key(self, text, kind="block"):
+        digest = hashlib.sha256(f"{CACHE_VERSION}:{kind}:".encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        previous = self.entries.pop(key, None)
+        if previous is None:
+            if self.track_new:
+                self.new_keys.append(key)
+        else:
+            self.size -= len(previous)
+        self.entries[key] = html
+        self.size += len(html)
+        self._evict()
+
+    def _evict(self):
+        while self.entries and (
+            (self.max_entries is not None and len(self.entries) > self.max_entries)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _, html = self.entries.popitem(last=False)
+            self.size -= len(html)
+            self.evictions += 1
+
+    def pop_new_entries(self):
+        new_entries = [(key, self.entries[key]) for key in self.new_keys if key in self.entries]
+        self.new_keys = []
+        return new_entries
+
+    def merge(self, entries, hits=0, misses=0):
+        for key, html in entries:
+            self.put(key, html)
+        self.hits += hits
+        self.misses += misses
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as cache_file:
+            try:
+                data = json.load(cache_file)
+            except json.JSONDecodeError:
+                return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.entries.clear()
+        self.size = 0
+        for key, html in data["entries"]:
+            self.entries[key] = html
+            self.size += len(html)
+        self.new_keys = []
+        self._evict()
+
+    def save(self):
+        if not self.path:
+            raise ValueError("BlockCache has no path to save to")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump({"version": CACHE_VERSION, "entries": list(self.entries.items())}, cache_file)
+        os.replace(temp_path, self.path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (
+            f"block cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate), {stats['evictions']} evictions, "
+            f"{stats['entries']} entries"
+        )
@@ -1,18 +1,121 @@
 from enum import Enum
-import re
+import io
 from htmlnode import HTMLNode
 
 
+def iter_source_lines(source):
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    if hasattr(source, "readline") and not hasattr(source, "__iter__"):
+        source = iter(source.readline, b"")
+    for line in source:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        yield line
+
+def iter_block_lines(source):
+    # Blocks are separated by empty lines; whitespace-only lines only count
+    # as content in the middle of a block, like markdown_to_blocks always did.
+    block_lines = []
+    pending_blank = 0
+    first_line = 0
+    for number, line in enumerate(iter_source_lines(source), 1):
+        if line in ("\n", "\r\n", ""):
+            if block_lines:
+                yield "\n".join(block_lines), (first_line, number - 1 - pending_blank)
+                block_lines = []
+            pending_blank = 0
+            continue
+        stripped = line.strip()
+        if not stripped:
+            if block_lines:
+                pending_blank += 1
+            continue
+        if not block_lines:
+            first_line = number
+        elif pending_blank:
+            block_lines.extend([""] * pending_blank)
+        pending_blank = 0
+        block_lines.append(stripped)
+    if block_lines:
+        yield "\n".join(block_lines), (first_line, number - pending_blank)
+
+def open_line_reader(source):
+    # A reader with readline, tell and seek, or None when the source cannot
+    # be read twice.
+    if isinstance(source, str):
+        return io.StringIO(source)
+    if not all(hasattr(source, name) for name in ("readline", "tell", "seek")):
+        return None
+    if hasattr(source, "seekable") and not source.seekable():
+        return None
+    return source
+
+def iter_stream_blocks(source, max_lines):
+    # Yields (block, None) like iter_block_lines, except that a block of a
+    # seekable source growing past max_lines lines is yielded as
+    # (None, LargeBlock) instead of being joined in memory.
+    reader = open_line_reader(source)
+    if reader is None:
+        for block, _ in iter_block_lines(source):
+            yield block, None
+        return
+    block_lines = []
+    large_block = None
+    pending_blank = 0
+    start = reader.tell()
+    while True:
+        line = reader.readline()
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if line in ("\n", "\r\n", ""):
+            if large_block is not None:
+                resume = reader.tell()
+                yield None, large_block
+                reader.seek(resume)
+            elif block_lines:
+                yield "\n".join(block_lines), None
+            if line == "":
+                return
+            block_lines = []
+            large_block = None
+            pending_blank = 0
+            start = reader.tell()
+            continue
+        stripped = line.strip()
+        if not stripped:
+            if block_lines or large_block is not None:
+                pending_blank += 1
+            else:
+                start = reader.tell()
+            continue
+        if pending_blank:
+            if large_block is not None:
+                for _ in range(pending_blank):
+                    large_block.add("")
+            else:
+                block_lines.extend([""] * pending_blank)
+            pending_blank = 0
+        if large_block is not None:
+            large_block.add(stripped)
+            continue
+        block_lines.append(stripped)
+        if len(block_lines) > max_lines:
+            large_block = LargeBlock(reader, start)
+            for block_line in block_lines:
+                large_block.add(block_line)
+            block_lines = []
+
+def iter_blocks(source):
+    for block, line_span in iter_block_lines(source):
+        yield block, block_to_block_type(block), line_span
+
+def iter_parsed_blocks(source):
+    for block, line_span in iter_block_lines(source):
+        yield block, parse_block(block), line_span
+
 def markdown_to_blocks(markdown):
-    split_markdown = markdown.strip().split("\n\n")
-    strip_markdown = []
-    for split in split_markdown:
-        block_line = split.split("\n")
-        strip_block = [line.strip() for line in block_line]
-        clean_block = "\n".join(strip_block)
-        if clean_block:
-            strip_markdown.append(clean_block)
-    return strip_markdown
+    return [block for block, _ in iter_block_lines(markdown)]
 
 
 class BlockType(Enum):
@@ -27,22 +130,153 @@ def is_ordered_list_line(line, expected_number):
     parts = line.split(' ', 1)
     return len(parts) > 1 and parts[0] == f"{expected_number}."
 
-def block_to_block_type(block):
+class ParsedBlock:
+    # anchor is the heading id a collector assigned, if any.
+    __slots__ = ("block_type", "text", "level", "items", "lines", "anchor")
+
+    def __init__(self, block_type, text=None, level=None, items=None, lines=None, anchor=None):
+        self.block_type = block_type
+        self.text = text
+        self.level = level
+        self.items = items
+        self.lines = lines
+        self.anchor = anchor
+
+    def inline_texts(self):
+        match self.block_type:
+            case BlockType.CODE:
+                return []
+            case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+                return self.items
+        return [self.text]
+
+    def __eq__(self, other):
+        if not isinstance(other, ParsedBlock):
+            return False
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"ParsedBlock({self.block_type.value}, {self.text!r}, {self.level}, {self.items}, {self.lines})"
+
+class LargeBlock:
+    # Classifies a block line by line in constant memory, the way parse_block
+    # would classify the joined block, and reads its lines again on demand.
+    __slots__ = ("reader", "start", "count", "first_line", "last_line", "quote", "unordered", "ordered")
+
+    def __init__(self, reader, start):
+        self.reader = reader
+        self.start = start
+        self.count = 0
+        self.first_line = None
+        self.last_line = None
+        self.quote = True
+        self.unordered = True
+        self.ordered = True
+
+    def add(self, line):
+        self.count += 1
+        if self.count == 1:
+            self.first_line = line
+        self.last_line = line
+        if self.quote and not line.startswith(">"):
+            self.quote = False
+        if self.unordered and not line.startswith("- "):
+            self.unordered = False
+        if self.ordered and not (line[:1].isdigit() and line.startswith(f"{self.count}. ")):
+            self.ordered = False
+
+    @property
+    def block_type(self):
+        first_line = self.first_line
+        if first_line.startswith("#") and " " in first_line and first_line.index(" ") <= 6:
+            return BlockType.HEADING
+        if first_line.startswith("```") and self.last_line.endswith("```"):
+            return BlockType.CODE
+        if self.quote:
+            return BlockType.QUOTE
+        if self.unordered:
+            return BlockType.UNORDERED_LIST
+        if self.ordered:
+            return BlockType.ORDERED_LIST
+        return BlockType.PARAGRAPH
+
+    def lines(self):
+        # The block's lines as iter_block_lines would have joined them; blank
+        # lines inside the block come back as "".
+        self.reader.seek(self.start)
+        for _ in range(self.count):
+            line = self.reader.readline()
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            yield line.strip()
+
+    def text(self):
+        return "\n".join(self.lines())
+
+def removing_code_mark(text): 
+    lines = text.split("\n")
+    if len(lines) == 1:
+        return text.strip("```").strip()
+    
+    first_line = lines[0]
+    if first_line.startswith("```"):
+        first_line = first_line[3:].strip()  
+
+    last_line = lines[-1]
+    if last_line.endswith("```"):
+        last_line = last_line[:-3].strip()
+    elif last_line.strip() == "```":
+        last_line = "" 
+
+    result_lines = [first_line] + lines[1:-1] + ([last_line] if last_line else [])
+    return "\n".join(result_lines)
+
+def code_block_body(block):
+    code_content = removing_code_mark(block)
+    if code_content.startswith("\n"):
+        code_content = code_content[1:]
+    if not code_content.endswith("\n"):
+        code_content += "\n"
+    return code_content
+
+def parse_block(block):
+    # Every line is looked at once: the quote, unordered and ordered checks
+    # run side by side and collect their item text while they are still valid.
     split_block = block.split("\n")
-    if split_block[0].startswith("#") and " " in split_block[0] and split_block[0].index(" ") <= 6:
-        return BlockType.HEADING
+    first_line = split_block[0]
+    if first_line.startswith("#") and " " in first_line and first_line.index(" ") <= 6:
+        level = len(first_line) - len(first_line.lstrip("#"))
+        return ParsedBlock(BlockType.HEADING, block.lstrip("#").lstrip(), min(level, 6))
     if block.startswith("```") and block.endswith("```"):
-         return BlockType.CODE
-    if all(line.startswith(">") for line in split_block):
-        return BlockType.QUOTE
-    if all(line.startswith("- ") for line in split_block):
-        return BlockType.UNORDERED_LIST
-    is_ordered_list = True
-    for i, line in enumerate(split_block, 1):
-        if not line.startswith(f"{i}. "):
-            is_ordered_list = False
-            break
-    if is_ordered_list:
-        return BlockType.ORDERED_LIST
-    
-    return BlockType.PARAGRAPH
+        return ParsedBlock(BlockType.CODE, code_block_body(block))
+    quote_lines = []
+    unordered_items = []
+    ordered_items = []
+    for number, line in enumerate(split_block, 1):
+        if quote_lines is not None:
+            if line.startswith(">"):
+                content = line[1:]
+                quote_lines.append(content[1:] if content[:1].isspace() else content)
+            else:
+                quote_lines = None
+        if unordered_items is not None:
+            if line.startswith("- "):
+                unordered_items.append(line[2:].lstrip())
+            else:
+                unordered_items = None
+        if ordered_items is not None:
+            marker = f"{number}. " if line[:1].isdigit() else None
+            if marker and line.startswith(marker):
+                ordered_items.append(line[len(marker):].lstrip())
+            else:
+                ordered_items = None
+        if quote_lines is None and unordered_items is None and ordered_items is None:
+            return ParsedBlock(BlockType.PARAGRAPH, block)
+    if quote_lines is not None:
+        return ParsedBlock(BlockType.QUOTE, "\n".join(quote_lines), lines=quote_lines)
+    if unordered_items is not None:
+        return ParsedBlock(BlockType.UNORDERED_LIST, items=unordered_items)
+    return ParsedBlock(BlockType.ORDERED_LIST, items=ordered_items)
+
+def block_to_block_type(block):
+    return parse_block(block).block_type
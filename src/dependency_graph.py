@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from textnode import TextType, text_to_textnodes
+
+INDEX_VERSION = 1
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def page_url_path(page):
+    return posixpath.splitext(page.replace(os.sep, "/"))[0] + ".html"
+
+def resolve_target(page, url, is_page_link=True):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith("/"):
+        target = parts.path.lstrip("/")
+    else:
+        target = posixpath.join(posixpath.dirname(page_url_path(page)), parts.path)
+    target = posixpath.normpath(target) if target else "."
+    if not is_page_link:
+        return target
+    if parts.path.endswith("/") or target == ".":
+        return posixpath.normpath(posixpath.join(target, "index.html"))
+    # A link to a page's .md source stays as written: nothing rewrites the
+    # href, so it is a 404 on the built site and broken_links reports it.
+    if not posixpath.splitext(target)[1]:
+        return target + ".html"
+    return target
+
+def asset_stamp(content_dir, asset):
+    try:
+        stat = os.stat(os.path.join(content_dir, asset))
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class LinkCollector:
+    def __init__(self):
+        self.links = []
+        self.images = []
+
+    def collect(self, parsed):
+        for text in parsed.inline_texts():
+            if "[" not in text:
+                continue
+            for node in text_to_textnodes(text.replace("\n", " ")):
+                if node.text_type == TextType.LINK:
+                    self.links.append(node.url)
+                elif node.text_type == TextType.IMAGE:
+                    self.images.append(node.url)
+
+
+class DependencyIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+        self.assets = {}
+        self.template_hash = None
+        if path and os.path.exists(path):
+            self.load()
+
+    def record(self, page, page_hash, links, images):
+        targets = {resolve_target(page, url) for url in links}
+        assets = {resolve_target(page, url, is_page_link=False) for url in images}
+        targets.discard(None)
+        assets.discard(None)
+        self.pages[page] = {"hash": page_hash, "links": sorted(targets), "assets": sorted(assets)}
+
+    def remove(self, page):
+        self.pages.pop(page, None)
+
+    def dependents(self, targets):
+        return {
+            page for page, entry in self.pages.items()
+            if not targets.isdisjoint(entry["links"]) or not targets.isdisjoint(entry["assets"])
+        }
+
+    def plan(self, page_hashes, template_hash, content_dir, out_dir):
+        # Returns the pages to render and the pages whose sources are gone.
+        removed = sorted(page for page in self.pages if page not in page_hashes)
+        if template_hash != self.template_hash:
+            return sorted(page_hashes), removed
+        render = {
+            page for page, page_hash in page_hashes.items()
+            if page not in self.pages
+            or self.pages[page]["hash"] != page_hash
+            or not os.path.exists(os.path.join(out_dir, page_url_path(page)))
+        }
+        touched = {page_url_path(page) for page in removed}
+        touched.update(page_url_path(page) for page in page_hashes if page not in self.pages)
+        touched.update(
+            asset for asset, stamp in self.assets.items() if asset_stamp(content_dir, asset) != stamp
+        )
+        if touched:
+            render.update(page for page in self.dependents(touched) if page in page_hashes)
+        return sorted(render), removed
+
+    def refresh_assets(self, content_dir):
+        assets = {asset for entry in self.pages.values() for asset in entry["assets"]}
+        self.assets = {asset: asset_stamp(content_dir, asset) for asset in sorted(assets)}
+
+    def broken_links(self):
+        outputs = {page_url_path(page) for page in self.pages}
+        broken = []
+        for page, entry in sorted(self.pages.items()):
+            broken.extend((page, target) for target in entry["links"] if target not in outputs)
+            broken.extend((page, asset) for asset in entry["assets"] if self.assets.get(asset) is None)
+        return broken
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as index_file:
+            try:
+                data = json.load(index_file)
+            except json.JSONDecodeError:
+                return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.pages = data["pages"]
+        self.assets = data["assets"]
+        self.template_hash = data["template_hash"]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({
+                "version": INDEX_VERSION,
+                "template_hash": self.template_hash,
+                "pages": self.pages,
+                "assets": self.assets,
+            }, index_file)
+        os.replace(temp_path, self.path)
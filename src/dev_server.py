@@ -0,0 +1,109 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from block_cache import BlockCache
+from site_generator import find_pages, generate_page, generate_site, page_output_path
+from template import Template
+
+
+def snapshot_mtimes(content_dir, template):
+    mtimes = {}
+    for page in find_pages(content_dir):
+        try:
+            mtimes[page] = os.stat(os.path.join(content_dir, page)).st_mtime_ns
+        except FileNotFoundError:
+            continue
+    mtimes[None] = os.stat(template).st_mtime_ns
+    return mtimes
+
+
+class SiteWatcher:
+    def __init__(self, content_dir, template, out_dir, debounce=0.3):
+        self.content_dir = content_dir
+        self.template = template
+        self.out_dir = out_dir
+        self.debounce = debounce
+        self.cache = BlockCache()
+        # Pages whose last render raised; they are tried again on the next
+        # rebuild, whatever changed.
+        self.failed = set()
+        self.mtimes = snapshot_mtimes(content_dir, template)
+        self.template_html = self.read_template()
+
+    def read_template(self):
+        return Template.from_file(self.template)
+
+    def poll(self):
+        current = snapshot_mtimes(self.content_dir, self.template)
+        if current == self.mtimes:
+            return None
+        # Editors often save in bursts (write, rename, touch); wait until the
+        # tree has been quiet for the debounce window before rebuilding.
+        while True:
+            time.sleep(self.debounce)
+            settled = snapshot_mtimes(self.content_dir, self.template)
+            if settled == current:
+                break
+            current = settled
+        previous, self.mtimes = self.mtimes, current
+        changed = [page for page, mtime in current.items() if page is not None and previous.get(page) != mtime]
+        removed = [page for page in previous if page is not None and page not in current]
+        return {"template": previous.get(None) != current.get(None), "changed": sorted(changed), "removed": sorted(removed)}
+
+    def rebuild(self, changes):
+        if changes["template"]:
+            self.template_html = self.read_template()
+            changed = [page for page in self.mtimes if page is not None]
+        else:
+            changed = changes["changed"]
+        changed = sorted(set(changed) | (self.failed - set(changes["removed"])))
+        self.failed = set()
+        rebuilt = 0
+        for page in changed:
+            try:
+                generate_page(page, self.content_dir, self.template_html, self.out_dir, self.cache)
+            except Exception as error:
+                # A half-typed page must not take the server down; report it
+                # and keep serving the last good output.
+                self.failed.add(page)
+                print(f"Failed to build {page}: {error}")
+            else:
+                rebuilt += 1
+        for page in changes["removed"]:
+            try:
+                os.remove(page_output_path(page, self.out_dir))
+            except FileNotFoundError:
+                pass
+        return rebuilt, len(changes["removed"])
+
+
+def start_http_server(out_dir, host, port):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=out_dir)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def serve(content_dir, template, out_dir, host="127.0.0.1", port=8888, interval=0.5, debounce=0.3, workers=1):
+    result = generate_site(content_dir, template, out_dir, workers=workers)
+    print(f"Generated {result['pages']} pages into {out_dir}")
+    watcher = SiteWatcher(content_dir, template, out_dir, debounce)
+    server = start_http_server(out_dir, host, port)
+    print(f"Serving {out_dir} at http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            changes = watcher.poll()
+            if changes is None:
+                continue
+            start = time.perf_counter()
+            rebuilt, removed = watcher.rebuild(changes)
+            print(f"Rebuilt {rebuilt} pages, removed {removed} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
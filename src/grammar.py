@@ -0,0 +1,57 @@
+import re
+
+# Every pattern the block and inline parsers use, compiled once at import.
+
+INLINE_DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# Images fill groups 1-2 and links groups 3-4, so one finditer finds both in
+# source order.
+INLINE_LINK_PATTERN = re.compile(f"{IMAGE_PATTERN.pattern}|{LINK_PATTERN.pattern}")
+
+ORDERED_LIST_PATTERN = re.compile(r"^\s*\d+\.\s")
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:\d+\.|\-)\s+")
+QUOTE_MARKER_PATTERN = re.compile(r"^\s*>\s?")
+
+TEMPLATE_SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+SLUG_SEPARATOR_PATTERN = re.compile(r"[^\w]+|_+")
+SEARCH_TERM_PATTERN = re.compile(r"[^\W_]+")
+
+HTML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+ATTRIBUTE_ESCAPES = {**HTML_ESCAPES, '"': "&quot;", "'": "&#x27;"}
+HTML_ESCAPE_TABLE = str.maketrans(HTML_ESCAPES)
+ATTRIBUTE_ESCAPE_TABLE = str.maketrans(ATTRIBUTE_ESCAPES)
+
+
+def find_images(text, start=0, end=None):
+    return IMAGE_PATTERN.finditer(text, start, len(text) if end is None else end)
+
+def find_links(text, start=0, end=None):
+    return LINK_PATTERN.finditer(text, start, len(text) if end is None else end)
+
+def find_inline_links(text, start=0, end=None):
+    return INLINE_LINK_PATTERN.finditer(text, start, len(text) if end is None else end)
+
+def find_delimiters(text):
+    return INLINE_DELIMITER_PATTERN.finditer(text)
+
+def has_inline_markup(text):
+    # Plain `in` checks beat a regex search on the prose that makes up most
+    # pages; "!" only matters in front of "[".
+    return "[" in text or "_" in text or "`" in text or "**" in text
+
+def has_html_special(text):
+    return "&" in text or "<" in text or ">" in text
+
+def escape_html(text):
+    # Most text has nothing to escape: substring checks cost a fraction of
+    # a regex search, and translate only runs when it has work to do.
+    if "&" in text or "<" in text or ">" in text:
+        return text.translate(HTML_ESCAPE_TABLE)
+    return text
+
+def escape_attribute(text):
+    if "&" in text or "<" in text or ">" in text or '"' in text or "'" in text:
+        return text.translate(ATTRIBUTE_ESCAPE_TABLE)
+    return text
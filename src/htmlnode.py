@@ -1,8 +1,32 @@
-import re
+from types import MappingProxyType
 
+from grammar import escape_attribute, escape_html
+from inline_cache import LRUCache
+
+# Serialized attributes of prop dicts seen before, keyed by their items: the
+# same href or class shows up on page after page.
+ATTRIBUTE_CACHE = LRUCache(4096)
+
+
+def serialize_props(props):
+    # The value type is part of the key: True, 1 and 1.0 compare and hash
+    # equal but serialize differently.
+    key = tuple((name, type(value), value) for name, value in props.items())
+    try:
+        serialized = ATTRIBUTE_CACHE.get(key)
+    except TypeError:
+        key = None
+        serialized = None
+    if serialized is None:
+        serialized = "".join(f' {name}="{escape_attribute(str(value))}"' for name, value in props.items())
+        if key is not None:
+            ATTRIBUTE_CACHE.put(key, serialized)
+    return serialized
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -12,41 +36,98 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def html_parts(self):
+        return self.to_html(), None, None
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack so deep nesting neither
+        # recurses nor re-copies the markup of already rendered children.
+        stack = [(iter((self,)), None)]
+        while stack:
+            children, closing = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                if closing:
+                    yield closing
+                continue
+            opening, node_children, node_closing = node.html_parts()
+            yield opening
+            if node_children is not None:
+                stack.append((iter(node_children), node_closing))
+            elif node_closing:
+                yield node_closing
+
+    def write_html(self, stream, batch_size=1024):
+        pending = []
+        for chunk in self.iter_html():
+            pending.append(chunk)
+            if len(pending) >= batch_size:
+                stream.write("".join(pending))
+                pending.clear()
+        if pending:
+            stream.write("".join(pending))
+
     def props_to_html(self):
-        result = []
         if not self.props:
             return ""
-        for key, value in self.props.items():
-            result.append(f' {key}="{value}"')
-        return "".join(result)
+        return serialize_props(self.props)
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
-        if not self.value:
+        if self.value is None:
             raise ValueError("A leaf node must have a value")
         if not self.tag:
-            return f"{self.value}"
-        return f"<{self.tag}{super().props_to_html()}>{self.value}</{self.tag}>"
+            return escape_html(str(self.value))
+        return f"<{self.tag}{self.props_to_html()}>{escape_html(str(self.value))}</{self.tag}>"
+
+class FrozenLeafNode(LeafNode):
+    # A leaf that cannot change after construction, so one instance can be
+    # shared between any number of trees.
+    __slots__ = ()
+
+    def __init__(self, tag, value, props=None):
+        object.__setattr__(self, "tag", tag)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "children", None)
+        object.__setattr__(self, "props", MappingProxyType(dict(props)) if props else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def html_parts(self):
         if not self.tag:
             raise ValueError("A parent node must have a tag")
         if not self.children:
             raise ValueError("A parent node must have a children")
-        parent_result = f"<{self.tag}{self.props_to_html()}>"
-        for child in self.children:
-            parent_result += child.to_html()
-        parent_result += f"</{self.tag}>"
-        return parent_result 
- 
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
+
+class RawNode(HTMLNode):
+    # Holds markup that is already rendered and escaped; it is emitted as is.
+    __slots__ = ()
 
+    def __init__(self, html):
+        super().__init__(None, html, None, None)
+
+    def to_html(self):
+        return self.value
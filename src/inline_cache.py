@@ -0,0 +1,68 @@
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 4096
+
+
+class LRUCache:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "capacity": self.capacity,
+        }
+
+
+# Both caches are off until configure_inline_cache() turns them on. The
+# textnode cache copies its nodes on every hit and the children cache keeps
+# HTML strings and builds new nodes from them, so callers cannot change what
+# later lookups see.
+_caches = {"textnodes": None, "children": None}
+
+
+def configure_inline_cache(capacity=DEFAULT_CAPACITY, enabled=True):
+    if enabled:
+        _caches["textnodes"] = LRUCache(capacity)
+        _caches["children"] = LRUCache(capacity)
+    else:
+        _caches["textnodes"] = None
+        _caches["children"] = None
+
+def textnode_cache():
+    return _caches["textnodes"]
+
+def children_cache():
+    return _caches["children"]
+
+def inline_cache_stats():
+    return {name: cache.stats() for name, cache in _caches.items() if cache is not None}
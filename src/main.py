@@ -1,9 +1,167 @@
-from textnode import TextNode, TextType
+import argparse
+import os
+import sys
 
-def main():
-    test = TextNode("this is some anchor text", TextType.LINK, "https://www.boot.dev")
-    print(test)
+# Commands import what they need when they run, so `render` against a
+# daemon never loads the parser.
+
+
+def add_site_args(parser):
+    parser.add_argument("--content", default="content", help="directory of markdown pages")
+    parser.add_argument("--template", default="template.html", help="HTML page template")
+    parser.add_argument("--out", default="public", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 1 builds serially")
+    parser.add_argument("--inline-cache", type=int, default=0, metavar="N", help="memoize up to N repeated inline fragments, 0 disables")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build a static site from markdown")
+    commands = parser.add_subparsers(dest="command")
+
+    build = commands.add_parser("build", help="build the site once (default)")
+    add_site_args(build)
+    build.add_argument("--cache", default=None, help="path of the persistent block cache")
+    build.add_argument("--cache-max-entries", type=int, default=None, metavar="N", help="evict the least recently used blocks beyond N entries (default 200000), 0 for no limit")
+    build.add_argument("--cache-max-bytes", type=int, default=None, metavar="N", help="evict the least recently used blocks beyond N bytes of HTML (default 256MB), 0 for no limit")
+    build.add_argument("--deps", default=None, help="path of the persistent dependency index; only affected pages are re-rendered")
+    build.add_argument("--manifest", default=None, help="path of the output hash manifest; unchanged pages are not rewritten")
+    build.add_argument("--assets", action="store_true", help="publish referenced images under content-hash names")
+    build.add_argument("--asset-manifest", default=None, help="path of the asset manifest; unchanged images are not hashed or copied again")
+    build.add_argument("--hardlink-assets", action="store_true", help="hardlink published images instead of copying them")
+    build.add_argument("--toc", action="store_true", help="give headings ids and fill the Toc template slot")
+    build.add_argument("--search-index", default=None, help="path of the persistent search postings; shards are written to OUT/search/")
+    build.add_argument("--profile", default=None, metavar="PREFIX", help="write per-stage timings to PREFIX.json and PREFIX.prof")
+    build.add_argument("--profile-memory", action="store_true", help="also record allocated bytes per stage")
+    build.add_argument("--async-io", action="store_true", help="overlap reads and writes with parsing using asyncio")
+    build.add_argument("--slot", action="append", default=[], metavar="NAME=VALUE", help="fill a custom template slot on every page")
+
+    serve = commands.add_parser("serve", help="build, serve over HTTP and rebuild changed pages")
+    add_site_args(serve)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8888)
+    serve.add_argument("--interval", type=float, default=0.5, help="seconds between content polls")
+    serve.add_argument("--debounce", type=float, default=0.3, help="quiet seconds before rebuilding")
+
+    render = commands.add_parser("render", help="render one markdown snippet to stdout")
+    render.add_argument("file", nargs="?", default=None, help="markdown file, stdin when omitted")
+    render.add_argument("--socket", default=None, help="render through the daemon listening here, in process when it is not running")
+
+    daemon = commands.add_parser("daemon", help="keep a warm parser listening on a Unix socket")
+    daemon.add_argument("--socket", required=True, help="path of the Unix socket to listen on")
+    daemon.add_argument("--cache-size", type=int, default=4096, help="blocks and inline fragments kept between requests")
+
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in commands.choices and argv[0] not in ("-h", "--help"):
+        argv = ["build", *argv]
+    args = parser.parse_args(argv)
+    if args.command in ("build", "serve"):
+        if not os.path.isdir(args.content):
+            parser.error(f"content directory not found: {args.content} (pass --content)")
+        if not os.path.isfile(args.template):
+            parser.error(f"template not found: {args.template} (pass --template)")
+    if args.command == "build" and min(args.cache_max_entries or 0, args.cache_max_bytes or 0) < 0:
+        parser.error("--cache-max-entries and --cache-max-bytes must not be negative")
+    if args.command == "build" and args.async_io:
+        unsupported = [
+            flag for flag, value in (
+                ("--deps", args.deps), ("--assets", args.assets), ("--asset-manifest", args.asset_manifest),
+                ("--hardlink-assets", args.hardlink_assets), ("--toc", args.toc),
+                ("--search-index", args.search_index), ("--profile", args.profile),
+                ("--profile-memory", args.profile_memory),
+            )
+            if value
+        ]
+        if unsupported:
+            parser.error(f"--async-io cannot be combined with {', '.join(unsupported)}")
+    return args
+
+def build(args):
+    from site_generator import generate_site
+
+    slots = dict(slot.split("=", 1) for slot in args.slot)
+    cache_limits = {}
+    if args.cache_max_entries is not None:
+        cache_limits["cache_max_entries"] = args.cache_max_entries or None
+    if args.cache_max_bytes is not None:
+        cache_limits["cache_max_bytes"] = args.cache_max_bytes or None
+    if args.async_io:
+        from async_build import build_site
+
+        result = build_site(
+            args.content, args.template, args.out, parse_workers=args.workers, cache_path=args.cache,
+            manifest_path=args.manifest, slots=slots, **cache_limits,
+        )
+    else:
+        result = generate_site(
+            args.content, args.template, args.out, workers=args.workers, cache_path=args.cache,
+            profile=args.profile is not None, track_memory=args.profile_memory,
+            dependency_index_path=args.deps, slots=slots,
+            manifest_path=args.manifest, publish_assets=args.assets, asset_manifest_path=args.asset_manifest,
+            hardlink_assets=args.hardlink_assets, heading_ids=args.toc, search_index_path=args.search_index,
+            **cache_limits,
+        )
+    print(f"Generated {result['pages']} pages into {args.out}")
+    if result["unchanged"]:
+        print(f"{len(result['unchanged'])} pages unchanged, not rewritten")
+    for page, target in result.get("broken_links", []):
+        print(f"Broken link in {page}: {target}")
+    if "assets" in result:
+        assets = result["assets"]
+        print(f"Published {len(assets['copied'])} images, {len(assets['unchanged'])} unchanged")
+        for asset in assets["missing"]:
+            print(f"Missing image: {asset}")
+    if "cache_report" in result:
+        print(result["cache_report"])
+    if "profiler" in result:
+        result["profiler"].write_json(f"{args.profile}.json")
+        result["profiler"].dump_stats(f"{args.profile}.prof")
+        print(f"Wrote profile to {args.profile}.json and {args.profile}.prof")
+
+def render(args):
+    if args.file is None:
+        markdown = sys.stdin.read()
+    else:
+        with open(args.file, encoding="utf-8") as markdown_file:
+            markdown = markdown_file.read()
+    if args.socket:
+        from render_daemon import render_remote
+
+        try:
+            html = render_remote(args.socket, markdown)
+        except (ConnectionError, FileNotFoundError, TimeoutError):
+            # No daemon, or one that does not answer: render in process.
+            html = None
+        if html is not None:
+            sys.stdout.write(html)
+            return
+    from markdown_parser import markdown_to_html
+
+    sys.stdout.write(markdown_to_html(markdown))
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "render":
+        render(args)
+        return
+    if args.command == "daemon":
+        from render_daemon import serve_daemon
+
+        serve_daemon(args.socket, args.cache_size)
+        return
+    if args.inline_cache:
+        from inline_cache import configure_inline_cache
+
+        configure_inline_cache(args.inline_cache)
+    if args.command == "serve":
+        from dev_server import serve
+
+        serve(
+            args.content, args.template, args.out, host=args.host, port=args.port,
+            interval=args.interval, debounce=args.debounce, workers=args.workers,
+        )
+    else:
+        build(args)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,15 +1,35 @@
-import re
-from textnode import text_node_to_html_node, text_to_textnodes, TextNode, TextType
-from htmlnode import HTMLNode, ParentNode, LeafNode
-from block_types import BlockType, block_to_block_type, markdown_to_blocks
+from itertools import chain
+
+import profiling
+from inline_cache import children_cache
+from grammar import escape_html, has_inline_markup, LIST_MARKER_PATTERN, ORDERED_LIST_PATTERN, QUOTE_MARKER_PATTERN
+from textnode import image_url_salt, scan_inline_spans, spans_to_html, text_node_to_html_node, text_to_textnodes, TextNode, TextType
+from htmlnode import HTMLNode, ParentNode, LeafNode, RawNode
+from block_types import (
+    BlockType,
+    block_to_block_type,
+    iter_block_lines,
+    iter_stream_blocks,
+    markdown_to_blocks,
+    parse_block,
+    removing_code_mark,
+)
 
 def text_to_children(text):
+    # The inline markup is emitted straight from the scanner's offset spans
+    # as one RawNode, so no TextNode or LeafNode is built per fragment.
     text = text.replace("\n", " ")
-    text_nodes = text_to_textnodes(text)
-    html_node = []
-    for text_node in text_nodes:
-        html_node.append(text_node_to_html_node(text_node))
-    return html_node
+    cache = children_cache()
+    if cache is not None:
+        key = text + image_url_salt(text)
+        html = cache.get(key)
+        if html is not None:
+            return [RawNode(html)] if html else []
+    spans = scan_inline_spans(text)
+    html = spans_to_html(text, spans) if spans else ""
+    if cache is not None:
+        cache.put(key, html)
+    return [RawNode(html)] if html else []
 
 def count_heading_level(text):
     header = text.strip() 
@@ -30,26 +50,8 @@ def removing_header_mark(text):
     result = "" 
     return text[index:]
     
-def removing_code_mark(text): 
-    lines = text.split("\n")
-    if len(lines) == 1:
-        return text.strip("```").strip()
-    
-    first_line = lines[0]
-    if first_line.startswith("```"):
-        first_line = first_line[3:].strip()  
-
-    last_line = lines[-1]
-    if last_line.endswith("```"):
-        last_line = last_line[:-3].strip()
-    elif last_line.strip() == "```":
-        last_line = "" 
-
-    result_lines = [first_line] + lines[1:-1] + ([last_line] if last_line else [])
-    return "\n".join(result_lines)
-
 def is_ordered_list(line):
-    return bool(re.match(r'^\s*\d+\.\s', line))
+    return ORDERED_LIST_PATTERN.match(line) is not None
 
 def is_unordered_list(line):
     return line.startswith("- ")
@@ -61,7 +63,7 @@ def making_line_list(text):
         stripped_line = line.strip()
         if is_ordered_list(stripped_line) or is_unordered_list(stripped_line):
             # Extract the content after the marker
-            content = re.sub(r'^\s*(?:\d+\.|\-)\s+', '', stripped_line)
+            content = LIST_MARKER_PATTERN.sub('', stripped_line, count=1)
             # Create a proper list item with children
             li_node = ParentNode("li", text_to_children(content))
             result.append(li_node)
@@ -72,40 +74,344 @@ def deleting_markdown_quote(text):
     result = []
     for line in split_text:
         stripped_line = line.strip()
-        content = re.sub(r'^\s*>\s?', '', stripped_line)
+        content = QUOTE_MARKER_PATTERN.sub('', stripped_line, count=1)
         result.append(content)
     return "\n".join(result)
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+def parsed_block_to_html_node(parsed):
+    match parsed.block_type:
+        case BlockType.PARAGRAPH:
+            node = ParentNode("p", text_to_children(parsed.text))
+        case BlockType.HEADING:
+            props = {"id": parsed.anchor} if parsed.anchor else None
+            node = ParentNode(f"h{parsed.level}", text_to_children(parsed.text), props)
+        case BlockType.CODE:
+            code_node = text_node_to_html_node(TextNode(parsed.text, TextType.CODE))
+            node = ParentNode("pre", [code_node])
+        case BlockType.UNORDERED_LIST:
+            node = ParentNode("ul", [ParentNode("li", text_to_children(item)) for item in parsed.items])
+        case BlockType.ORDERED_LIST:
+            node = ParentNode("ol", [ParentNode("li", text_to_children(item)) for item in parsed.items])
+        case BlockType.QUOTE:
+            node = ParentNode("blockquote", text_to_children(parsed.text))
+    return node
+
+# Only headings, code, quotes and lists start with one of these; any other
+# block is a paragraph.
+NON_PARAGRAPH_STARTS = frozenset("#`>-1")
+
+def is_plain_paragraph(block):
+    return block[0] not in NON_PARAGRAPH_STARTS and not has_inline_markup(block)
+
+def plain_paragraph_node(block):
+    # A paragraph without inline markup renders to its own text, so it skips
+    # classification, span scanning and the block cache. Returns None for
+    # every other block.
+    if not is_plain_paragraph(block):
+        return None
+    return LeafNode("p", block.replace("\n", " "))
+
+def block_to_html_node(block):
+    return parsed_block_to_html_node(parse_block(block))
+
+def block_cache_key(block, cache, parsed=None):
+    salt = image_url_salt(block)
+    if parsed is not None and parsed.anchor:
+        salt += f"\0#{parsed.anchor}"
+    return cache.key(block + salt)
+
+def cached_block_to_html_node(block, cache, parsed=None):
+    key = block_cache_key(block, cache, parsed)
+    html = cache.get(key)
+    if html is None:
+        if parsed is None:
+            parsed = parse_block(block)
+        html = parsed_block_to_html_node(parsed).to_html()
+        cache.put(key, html)
+    return RawNode(html)
+
+def collected_block_to_html_node(block, cache, collectors):
+    parsed = parse_block(block)
+    for collector in collectors:
+        collector.collect(parsed)
+    if cache is None:
+        return parsed_block_to_html_node(parsed)
+    return cached_block_to_html_node(block, cache, parsed)
+
+def profiled_markdown_to_html_node(markdown, cache, profiler, collectors=()):
+    with profiler.stage("split_blocks"):
+        blocks = [block for block, _ in iter_block_lines(markdown)]
     html_node = []
     for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.PARAGRAPH:
-                node = ParentNode("p", text_to_children(block))
-            case BlockType.HEADING:
-                level = count_heading_level(block)
-                node = ParentNode(f"h{level}", text_to_children(removing_header_mark(block)))
-            case BlockType.CODE:
-                code_content = removing_code_mark(block)
-                if code_content.startswith("\n"):
-                   code_content = code_content[1:]
-                if not code_content.endswith("\n"):
-                    code_content += "\n"
-                code_node = text_node_to_html_node(TextNode(code_content, TextType.CODE))
-                node = ParentNode("pre", [code_node])
-            case BlockType.UNORDERED_LIST:
-                unordered_line = making_line_list(block)
-                node = ParentNode("ul", unordered_line)
-            case BlockType.ORDERED_LIST:
-                ordered_line = making_line_list(block)
-                node = ParentNode("ol", ordered_line)
-            case BlockType.QUOTE:
-                quote_content = deleting_markdown_quote(block)
-                node = ParentNode("blockquote", text_to_children(quote_content))
-                
+        parsed = None
+        if collectors:
+            with profiler.stage("parse_block"):
+                parsed = parse_block(block)
+            with profiler.stage("collect"):
+                for collector in collectors:
+                    collector.collect(parsed)
+        elif is_plain_paragraph(block):
+            with profiler.stage("render:paragraph_plain"):
+                html_node.append(plain_paragraph_node(block))
+            continue
+        if cache is not None:
+            with profiler.stage("cache_lookup"):
+                key = block_cache_key(block, cache, parsed)
+                html = cache.get(key)
+            if html is not None:
+                html_node.append(RawNode(html))
+                continue
+        if parsed is None:
+            with profiler.stage("parse_block"):
+                parsed = parse_block(block)
+        with profiler.stage(f"render:{parsed.block_type.value}"):
+            node = parsed_block_to_html_node(parsed)
+        if cache is not None:
+            with profiler.stage("to_html"):
+                html = node.to_html()
+            cache.put(key, html)
+            node = RawNode(html)
+        html_node.append(node)
+    return ParentNode("div", html_node)
+
+def markdown_to_html_node(markdown, cache=None, collectors=()):
+    # collectors see every ParsedBlock, cache hits included, through their
+    # collect() method while the page renders.
+    profiler = profiling.active_profiler()
+    if profiler is not None:
+        return profiled_markdown_to_html_node(markdown, cache, profiler, collectors)
+    if collectors:
+        return ParentNode("div", [
+            collected_block_to_html_node(block, cache, collectors) for block, _ in iter_block_lines(markdown)
+        ])
+    # markdown may be a str, a text or binary file object, or an mmap; the
+    # blocks are read lazily so the source is never split as a whole.
+    html_node = []
+    for block, _ in iter_block_lines(markdown):
+        node = plain_paragraph_node(block)
+        if node is None:
+            if cache is None:
+                node = block_to_html_node(block)
+            else:
+                node = cached_block_to_html_node(block, cache)
         html_node.append(node)
     
     parent_node = ParentNode("div", html_node)
     return parent_node
+
+def render_markdown_to_html(markdown, cache=None, collectors=()):
+    node = markdown_to_html_node(markdown, cache, collectors)
+    profiler = profiling.active_profiler()
+    if profiler is None:
+        return node.to_html()
+    with profiler.stage("to_html"):
+        return node.to_html()
+
+def markdown_to_html(markdown, cache=None, collectors=()):
+    if collectors:
+        return render_markdown_to_html(markdown, cache, collectors)
+    if cache is None or not isinstance(markdown, str):
+        return render_markdown_to_html(markdown, cache)
+    key = cache.key(markdown + image_url_salt(markdown), kind="page")
+    html = cache.get(key)
+    if html is None:
+        html = render_markdown_to_html(markdown, cache)
+        cache.put(key, html)
+    return html
+
+def _block_html_node(block, cache=None):
+    node = plain_paragraph_node(block)
+    if node is not None:
+        return node
+    if cache is None:
+        return block_to_html_node(block)
+    return cached_block_to_html_node(block, cache)
+
+def extend_markdown_html(markdown, parts, cache=None):
+    # Appends the same markup as markdown_to_html_node(...).to_html() to
+    # parts, block by block, without building the wrapping div node.
+    if profiling.active_profiler() is not None:
+        parts.extend(markdown_to_html_node(markdown, cache).iter_html())
+        return
+    start = len(parts)
+    parts.append("<div>")
+    for block, _ in iter_block_lines(markdown):
+        parts.extend(_block_html_node(block, cache).iter_html())
+    if len(parts) == start + 1:
+        raise ValueError("A parent node must have a children")
+    parts.append("</div>")
+
+# Blocks of a seekable source with more lines than this are streamed instead
+# of being joined and rendered as a whole.
+STREAM_BLOCK_LINES = 1024
+
+def iter_list_items_html(lines, ordered):
+    # One <li> per line; only the current item is held in memory.
+    for number, line in enumerate(lines, 1):
+        item = line[len(f"{number}. "):] if ordered else line[2:]
+        yield ParentNode("li", text_to_children(item.lstrip())).to_html()
+
+def _iter_code_pieces(lines):
+    # The lines removing_code_mark keeps, holding one line back to spot the
+    # closing fence; the block has at least two lines.
+    lines = iter(lines)
+    previous = next(lines)[3:].strip()
+    for line in lines:
+        yield previous
+        previous = line
+    last_line = previous[:-3].strip() if previous.endswith("```") else previous
+    if last_line:
+        yield last_line
+
+def iter_code_body(lines):
+    # Streams code_block_body(block), escaped, without joining the block: a
+    # leading empty line is dropped and a missing trailing newline is added.
+    pieces = _iter_code_pieces(lines)
+    first = next(pieces)
+    if first == "":
+        first = next(pieces, first)
+    yield escape_html(first)
+    last, joined = first, False
+    for piece in pieces:
+        yield "\n" + escape_html(piece)
+        last, joined = piece, True
+    if not (joined and last == ""):
+        yield "\n"
+
+def iter_large_block_html(large_block, cache=None):
+    match large_block.block_type:
+        case BlockType.UNORDERED_LIST:
+            return chain(("<ul>",), iter_list_items_html(large_block.lines(), False), ("</ul>",))
+        case BlockType.ORDERED_LIST:
+            return chain(("<ol>",), iter_list_items_html(large_block.lines(), True), ("</ol>",))
+        case BlockType.CODE:
+            return chain(("<pre><code>",), iter_code_body(large_block.lines()), ("</code></pre>",))
+    # Headings, quotes and paragraphs carry inline markup across lines, so
+    # they are joined and rendered like any other block.
+    return _block_html_node(large_block.text(), cache).iter_html()
+
+def write_markdown_html(markdown, stream, cache=None, batch_size=1024):
+    # Writes the markup of markdown_to_html(markdown) to stream as blocks are
+    # rendered. Lists and code blocks longer than STREAM_BLOCK_LINES lines
+    # are streamed item by item from a seekable source (a str, a file or an
+    # mmap), so memory does not grow with their size.
+    if profiling.active_profiler() is not None:
+        stream.write(markdown_to_html_node(markdown, cache).to_html())
+        return
+    parts = ["<div>"]
+    empty = True
+    for block, large_block in iter_stream_blocks(markdown, STREAM_BLOCK_LINES):
+        empty = False
+        if large_block is None:
+            parts.extend(_block_html_node(block, cache).iter_html())
+        else:
+            for part in iter_large_block_html(large_block, cache):
+                parts.append(part)
+                if len(parts) >= batch_size:
+                    stream.write("".join(parts))
+                    parts.clear()
+        if len(parts) >= batch_size:
+            stream.write("".join(parts))
+            parts.clear()
+    if empty:
+        raise ValueError("A parent node must have a children")
+    parts.append("</div>")
+    stream.write("".join(parts))
+
+def _iter_doc_pairs(docs):
+    for index, doc in enumerate(docs):
+        if isinstance(doc, str):
+            yield index, doc
+        else:
+            yield doc
+
+def _render_many_serial(pairs, cache=None):
+    parts = []
+    for doc_id, markdown in pairs:
+        parts.clear()
+        extend_markdown_html(markdown, parts, cache)
+        yield doc_id, "".join(parts)
+
+# The BlockCache of a markdown_to_html_many worker process, or None.
+_worker_cache = None
+
+
+def _init_many_worker(cache_state):
+    # cache_state is None or (entries, max_entries, max_bytes), a copy of the
+    # caller's cache.
+    global _worker_cache
+    if cache_state is None:
+        _worker_cache = None
+        return
+    from block_cache import BlockCache
+
+    entries, max_entries, max_bytes = cache_state
+    _worker_cache = BlockCache(None, max_entries, max_bytes)
+    _worker_cache.merge(entries)
+    _worker_cache.track_new = True
+
+def _render_many_chunk(pairs):
+    # Returns the chunk's pages with the cache entries, hits and misses it
+    # added, for the caller's cache to merge.
+    cache = _worker_cache
+    if cache is None:
+        return list(_render_many_serial(pairs)), [], 0, 0
+    hits, misses = cache.hits, cache.misses
+    results = list(_render_many_serial(pairs, cache))
+    return results, cache.pop_new_entries(), cache.hits - hits, cache.misses - misses
+
+def _chunk_results(future, cache):
+    results, entries, hits, misses = future.result()
+    if cache is not None:
+        cache.merge(entries, hits, misses)
+    return results
+
+def _iter_chunks(pairs, chunk_size):
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def markdown_to_html_many(docs, ordered=True, workers=1, cache=None, chunk_size=256):
+    # docs holds markdown strings (ids are their positions) or (doc_id,
+    # markdown) pairs; yields (doc_id, html) pairs.
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    pairs = _iter_doc_pairs(docs)
+    if workers == 1:
+        yield from _render_many_serial(pairs, cache)
+        return
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    chunks = _iter_chunks(pairs, chunk_size)
+    max_in_flight = workers * 2
+    cache_state = None
+    if cache is not None:
+        cache_state = (list(cache.entries.items()), cache.max_entries, cache.max_bytes)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_many_worker, initargs=(cache_state,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_render_many_chunk, chunk))
+            if len(pending) < max_in_flight:
+                continue
+            if ordered:
+                yield from _chunk_results(pending.popleft(), cache)
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from _chunk_results(future, cache)
+        if ordered:
+            while pending:
+                yield from _chunk_results(pending.popleft(), cache)
+        else:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from _chunk_results(future, cache)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode()).hexdigest()
+
+def manifest_key(path, out_dir):
+    return os.path.relpath(path, out_dir).replace(os.sep, "/")
+
+def atomic_write(path, text):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Write next to the target and rename over it, so readers (and rsync)
+    # never see a half-written page.
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+            temp_file.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class HashingWriter:
+    # Passes text through to stream while hashing it like content_hash.
+    def __init__(self, stream):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+        self.replaced = False
+
+    def write(self, text):
+        self.digest.update(text.encode())
+        return self.stream.write(text)
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+@contextmanager
+def atomic_stream(path, previous_digest=None):
+    # Like atomic_write for pages too large to hold as one string: yields a
+    # HashingWriter over a temp file that replaces path on success. When the
+    # content hashes to previous_digest and path exists, the temp file is
+    # dropped instead and path keeps its inode and mtime; the writer's
+    # replaced attribute tells which happened.
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+            stream = HashingWriter(temp_file)
+            yield stream
+        if stream.hexdigest() == previous_digest and os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+            stream.replaced = True
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class OutputWriter:
+    def __init__(self, out_dir, manifest_path=None, workers=8):
+        self.out_dir = out_dir
+        self.manifest_path = manifest_path
+        self.manifest = {}
+        self.written = []
+        self.unchanged = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.futures = []
+        if manifest_path and os.path.exists(manifest_path):
+            self.load_manifest()
+
+    def key(self, path):
+        return manifest_key(path, self.out_dir)
+
+    def needs_write(self, path, digest):
+        with self.lock:
+            return self.manifest.get(self.key(path)) != digest or not os.path.exists(path)
+
+    def write(self, path, html):
+        digest = content_hash(html)
+        if not self.needs_write(path, digest):
+            with self.lock:
+                self.unchanged.append(path)
+            return False
+        atomic_write(path, html)
+        with self.lock:
+            self.manifest[self.key(path)] = digest
+            self.written.append(path)
+        return True
+
+    def record(self, path, digest, written=True):
+        # For pages written elsewhere, e.g. streamed by a worker process.
+        with self.lock:
+            self.manifest[self.key(path)] = digest
+            (self.written if written else self.unchanged).append(path)
+
+    def submit(self, path, html):
+        if self.executor is None:
+            self.write(path, html)
+            return
+        self.futures.append(self.executor.submit(self.write, path, html))
+
+    def remove(self, path):
+        with self.lock:
+            self.manifest.pop(self.key(path), None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        try:
+            for future in self.futures:
+                future.result()
+        finally:
+            self.futures = []
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+        if self.manifest_path:
+            self.save_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        elif self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def load_manifest(self):
+        with open(self.manifest_path, encoding="utf-8") as manifest_file:
+            try:
+                data = json.load(manifest_file)
+            except json.JSONDecodeError:
+                return
+        if data.get("version") == MANIFEST_VERSION:
+            self.manifest = data["pages"]
+
+    def save_manifest(self):
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(self.manifest_path, json.dumps({"version": MANIFEST_VERSION, "pages": self.manifest}))
@@ -0,0 +1,148 @@
+import time
+from contextlib import contextmanager
+
+SITE_LABEL = "<site>"
+
+# json, marshal and tracemalloc are imported where they are used: most runs
+# never profile, and short CLI calls should not pay for them.
+
+# The profiler currently recording, or None. Instrumented code reads this once
+# per call, so leaving profiling off costs a single global lookup.
+_active_profiler = None
+
+
+def active_profiler():
+    return _active_profiler
+
+
+class Profiler:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.traced_memory = None
+        if track_memory:
+            import tracemalloc
+
+            self.traced_memory = tracemalloc.get_traced_memory
+        self.page = SITE_LABEL
+        self.stages = {}
+        self.callbacks = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def stage(self, name):
+        allocated = self.traced_memory()[0] if self.track_memory else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if self.track_memory:
+                allocated = self.traced_memory()[0] - allocated
+            self.record(name, seconds, allocated)
+
+    def record(self, name, seconds, allocated=0, calls=1):
+        key = (self.page, name)
+        stats = self.stages.get(key)
+        if stats is None:
+            stats = self.stages[key] = [0, 0.0, 0]
+        stats[0] += calls
+        stats[1] += seconds
+        stats[2] += allocated
+        for callback in self.callbacks:
+            callback(self.page, name, seconds, allocated)
+
+    @contextmanager
+    def page_label(self, page):
+        previous = self.page
+        self.page = page
+        try:
+            yield
+        finally:
+            self.page = previous
+
+    def merge(self, stages):
+        for (page, name), (calls, seconds, allocated) in stages.items():
+            stats = self.stages.setdefault((page, name), [0, 0.0, 0])
+            stats[0] += calls
+            stats[1] += seconds
+            stats[2] += allocated
+
+    def totals(self):
+        totals = {}
+        for (_, name), (calls, seconds, allocated) in self.stages.items():
+            stats = totals.setdefault(name, [0, 0.0, 0])
+            stats[0] += calls
+            stats[1] += seconds
+            stats[2] += allocated
+        return totals
+
+    def to_dict(self):
+        def entry(stats):
+            return {"calls": stats[0], "seconds": stats[1], "allocated_bytes": stats[2]}
+
+        pages = {}
+        for (page, name), stats in sorted(self.stages.items()):
+            pages.setdefault(page, {})[name] = entry(stats)
+        return {
+            "track_memory": self.track_memory,
+            "stages": {name: entry(stats) for name, stats in sorted(self.totals().items())},
+            "pages": pages,
+        }
+
+    def write_json(self, path):
+        import json
+
+        with open(path, "w") as json_file:
+            json.dump(self.to_dict(), json_file, indent=2)
+
+    def dump_stats(self, path):
+        # Same layout as cProfile's dump_stats, so pstats.Stats(path) and the
+        # usual viewers can sort and print the stage timings.
+        stats = {
+            (page, 0, name): (calls, calls, seconds, seconds, {})
+            for (page, name), (calls, seconds, _) in self.stages.items()
+        }
+        import marshal
+
+        with open(path, "wb") as stats_file:
+            marshal.dump(stats, stats_file)
+
+
+@contextmanager
+def profile(track_memory=False, profiler=None):
+    global _active_profiler
+    if profiler is None:
+        profiler = Profiler(track_memory)
+    started_tracing = False
+    if profiler.track_memory:
+        import tracemalloc
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+    previous = _active_profiler
+    _active_profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _active_profiler = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+@contextmanager
+def page_label(page):
+    if _active_profiler is None:
+        yield
+        return
+    with _active_profiler.page_label(page):
+        yield
+
+@contextmanager
+def stage(name):
+    if _active_profiler is None:
+        yield
+        return
+    with _active_profiler.stage(name):
+        yield
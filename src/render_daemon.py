@@ -0,0 +1,111 @@
+import os
+import socket
+import socketserver
+
+# Protocol: the client sends the markdown as UTF-8 and shuts down its write
+# side; the daemon answers "ok\n" followed by the HTML, or "error\n" followed
+# by the message, and closes the connection. Editor plugins can speak it
+# without Python.
+OK_STATUS = b"ok\n"
+ERROR_STATUS = b"error\n"
+RECEIVE_SIZE = 65536
+WARM_UP_MARKDOWN = "# Title\n\nSome **bold**, _italic_ and `code` with a [link](/a) and ![image](/b.png)\n\n- one\n- two\n\n1. one\n\n> quote\n\n```\ncode\n```"
+
+
+class RenderError(Exception):
+    pass
+
+
+def receive_all(connection):
+    chunks = []
+    while True:
+        chunk = connection.recv(RECEIVE_SIZE)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+class RenderHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        request = receive_all(self.request)
+        # Liveness probes and clients that give up send nothing; they get an
+        # empty page rather than a render error.
+        if not request:
+            response = OK_STATUS
+        else:
+            try:
+                html = self.server.render(request.decode("utf-8"))
+            except Exception as error:
+                response = ERROR_STATUS + str(error).encode("utf-8")
+            else:
+                response = OK_STATUS + html.encode("utf-8")
+        try:
+            self.request.sendall(response)
+        except ConnectionError:
+            # The client went away before reading the answer.
+            pass
+
+
+class RenderServer(socketserver.UnixStreamServer):
+    # Requests are handled one at a time: the inline and block caches are not
+    # shared between threads, and a preview renders in well under a
+    # millisecond once the parser is warm.
+    def __init__(self, path, cache_capacity=4096):
+        from block_cache import BlockCache
+        from inline_cache import configure_inline_cache
+        from markdown_parser import markdown_to_html
+
+        configure_inline_cache(cache_capacity)
+        self.cache = BlockCache(max_entries=cache_capacity)
+        self.markdown_to_html = markdown_to_html
+        self.render(WARM_UP_MARKDOWN)
+        remove_stale_socket(path)
+        super().__init__(path, RenderHandler)
+        os.chmod(path, 0o600)
+
+    def render(self, markdown):
+        # Edited previews repeat most of their blocks, so the block cache
+        # keeps them; the page itself changes on every keystroke.
+        return self.markdown_to_html(markdown, self.cache)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale_socket(path):
+    # A socket file nobody listens on is left over from a daemon that died.
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise RenderError(f"A render daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+def serve_daemon(path, cache_capacity=4096):
+    with RenderServer(path, cache_capacity) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+def render_remote(path, markdown, timeout=5.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path)
+        connection.sendall(markdown.encode("utf-8"))
+        connection.shutdown(socket.SHUT_WR)
+        response = receive_all(connection)
+    if response.startswith(OK_STATUS):
+        return response[len(OK_STATUS):].decode("utf-8")
+    if response.startswith(ERROR_STATUS):
+        raise RenderError(response[len(ERROR_STATUS):].decode("utf-8"))
+    raise RenderError("Malformed response from the render daemon")
@@ -0,0 +1,87 @@
+import json
+import os
+
+from block_types import BlockType
+from dependency_graph import page_url_path
+from grammar import SEARCH_TERM_PATTERN
+from output_writer import atomic_write
+from textnode import inline_plain_text
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_DIR = "search"
+
+
+def shard_name(term):
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else "_"
+
+
+class SearchCollector:
+    # Postings map each term of the page to the anchors of the sections it
+    # appears in, in page order; "" is the text before the first heading.
+    # Heading anchors come from a TocCollector placed before this one.
+    def __init__(self):
+        self.postings = {}
+        self.anchor = ""
+
+    def collect(self, parsed):
+        if parsed.block_type == BlockType.HEADING:
+            self.anchor = parsed.anchor or ""
+        for text in parsed.inline_texts():
+            for term in SEARCH_TERM_PATTERN.findall(inline_plain_text(text).lower()):
+                anchors = self.postings.setdefault(term, [])
+                if not anchors or anchors[-1] != self.anchor:
+                    anchors.append(self.anchor)
+
+
+class SearchIndex:
+    # Keeps the postings of every page next to the hash of the source they
+    # came from, so only changed pages are collected again.
+    def __init__(self, path=None):
+        self.path = path
+        self.pages = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def page_hashes(self):
+        return {page: entry["hash"] for page, entry in self.pages.items()}
+
+    def update(self, page, page_hash, postings):
+        self.pages[page] = {"hash": page_hash, "postings": postings}
+
+    def prune(self, pages):
+        for page in [page for page in self.pages if page not in pages]:
+            del self.pages[page]
+
+    def shards(self):
+        # Returns {shard: {term: [[url, anchor], ...]}}, sorted throughout so
+        # unchanged shards serialize to the same bytes.
+        shards = {}
+        for page, entry in sorted(self.pages.items()):
+            url = "/" + page_url_path(page)
+            for term, anchors in entry["postings"].items():
+                postings = shards.setdefault(shard_name(term), {}).setdefault(term, [])
+                postings.extend([url, anchor] for anchor in dict.fromkeys(anchors))
+        return {name: dict(sorted(terms.items())) for name, terms in sorted(shards.items())}
+
+    def write_shards(self, out_dir, writer):
+        shards = self.shards()
+        directory = os.path.join(out_dir, SEARCH_DIR)
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".json") and name[:-5] not in shards:
+                    writer.remove(os.path.join(directory, name))
+        for name, terms in shards.items():
+            writer.submit(os.path.join(directory, f"{name}.json"), json.dumps(terms, separators=(",", ":")))
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as index_file:
+            try:
+                data = json.load(index_file)
+            except json.JSONDecodeError:
+                return
+        if data.get("version") == SEARCH_INDEX_VERSION:
+            self.pages = data["pages"]
+
+    def save(self):
+        atomic_write(self.path, json.dumps({"version": SEARCH_INDEX_VERSION, "pages": self.pages}))
@@ -0,0 +1,287 @@
+import json
+import os
+
+import profiling
+from asset_pipeline import AssetPipeline, page_image_urls
+from block_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, BlockCache
+from dependency_graph import DependencyIndex, LinkCollector, source_hash
+from grammar import escape_html
+from markdown_parser import markdown_to_html, write_markdown_html
+from output_writer import OutputWriter, atomic_stream, atomic_write, manifest_key
+from search_index import SearchCollector, SearchIndex
+from template import Template, extract_title
+from textnode import image_urls
+from toc import TocCollector
+
+MAX_CHUNK_SIZE = 64
+# Larger pages are streamed from their source file to their output file.
+STREAM_PAGE_BYTES = 8 * 1024 * 1024
+
+_worker_state = {}
+
+
+def find_pages(content_dir):
+    pages = []
+    for root, _, files in os.walk(content_dir):
+        for name in files:
+            if name.endswith(".md"):
+                pages.append(os.path.relpath(os.path.join(root, name), content_dir))
+    return sorted(pages)
+
+def page_output_path(page, out_dir):
+    return os.path.join(out_dir, os.path.splitext(page)[0] + ".html")
+
+def render_page(markdown, template, cache=None, collectors=(), slots=None, toc=False):
+    # With toc, the Toc slot gets the table of contents of the TocCollector in
+    # collectors; otherwise it keeps a --slot value or is left empty.
+    if not isinstance(template, Template):
+        template = Template(template)
+    values = dict(slots) if slots else {}
+    values["Title"] = escape_html(extract_title(markdown) or "")
+    values["Content"] = markdown_to_html(markdown, cache, collectors)
+    values.setdefault("Toc", "")
+    if toc:
+        for collector in collectors:
+            if isinstance(collector, TocCollector):
+                values["Toc"] = collector.to_html()
+    return template.render(values)
+
+def write_page(path, html):
+    # The dev server rebuilds pages while it serves them; a reader sees the
+    # old page or the new one, never a truncated file.
+    atomic_write(path, html)
+
+def stream_page(source_path, template, out_path, cache=None, slots=None, previous_digest=None):
+    # Returns the content hash of the page and whether out_path was replaced;
+    # a page that hashes to previous_digest is not rewritten.
+    if not isinstance(template, Template):
+        template = Template(template)
+    with open(source_path, encoding="utf-8") as page_file:
+        values = dict(slots) if slots else {}
+        values["Title"] = escape_html(extract_title(page_file) or "")
+        values.setdefault("Toc", "")
+        page_file.seek(0)
+        with atomic_stream(out_path, previous_digest) as stream:
+            template.write(stream, values, {"Content": lambda out: write_markdown_html(page_file, out, cache)})
+    return stream.hexdigest(), stream.replaced
+
+def build_page(
+    page, content_dir, template, out_dir, cache=None, track_links=False, slots=None, asset_urls=None,
+    heading_ids=False, search_hashes=None, output_digests=None,
+):
+    # search_hashes maps pages to the source hash their stored search postings
+    # came from; the page is collected again only when its hash differs.
+    # output_digests is the output manifest, used to leave unchanged streamed
+    # pages in place.
+    source_path = os.path.join(content_dir, page)
+    collected = track_links or heading_ids or search_hashes is not None or asset_urls
+    if not collected and os.path.getsize(source_path) > STREAM_PAGE_BYTES:
+        path = page_output_path(page, out_dir)
+        previous_digest = output_digests.get(manifest_key(path, out_dir)) if output_digests else None
+        with profiling.page_label(page), profiling.stage("stream_page"):
+            digest, written = stream_page(source_path, template, path, cache, slots, previous_digest)
+        return {"page": page, "path": path, "digest": digest, "written": written}
+    with profiling.page_label(page):
+        with profiling.stage("read_page"):
+            with open(source_path, encoding="utf-8") as page_file:
+                markdown = page_file.read()
+        url_map = page_image_urls(page, markdown, asset_urls) if asset_urls else None
+        record = {"page": page, "path": page_output_path(page, out_dir)}
+        collectors = []
+        if track_links or search_hashes is not None:
+            record["hash"] = source_hash(markdown)
+        if track_links:
+            link_collector = LinkCollector()
+            collectors.append(link_collector)
+        if heading_ids or search_hashes is not None:
+            collectors.append(TocCollector())
+        search_collector = None
+        if search_hashes is not None and search_hashes.get(page) != record["hash"]:
+            search_collector = SearchCollector()
+            collectors.append(search_collector)
+        with image_urls(url_map):
+            record["html"] = render_page(markdown, template, cache, collectors, slots, heading_ids)
+        if track_links:
+            record.update(links=link_collector.links, images=link_collector.images)
+        if search_collector is not None:
+            record["postings"] = search_collector.postings
+    return record
+
+def build_hash(template_html, **options):
+    # Hashes the template with the build options that change page output, so
+    # the dependency index re-renders every page when one of them changes.
+    return source_hash(json.dumps([template_html, options], sort_keys=True))
+
+def generate_page(page, content_dir, template, out_dir, cache=None, track_links=False, slots=None):
+    record = build_page(page, content_dir, template, out_dir, cache, track_links, slots)
+    if "html" in record:
+        with profiling.page_label(page), profiling.stage("write_page"):
+            write_page(record["path"], record.pop("html"))
+    return record
+
+def chunk_pages(pages, workers, chunk_size=None):
+    if chunk_size is None:
+        chunk_size = max(1, min(MAX_CHUNK_SIZE, len(pages) // (workers * 4)))
+    return [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+def _init_worker(options, cache_path, cache_limits, profile, track_memory):
+    _worker_state["options"] = options
+    _worker_state["cache"] = BlockCache(cache_path, *cache_limits, track_new=True) if cache_path else None
+    _worker_state["profile"] = profile
+    _worker_state["track_memory"] = track_memory
+
+def _build_pages(pages, options, cache):
+    return [build_page(page, cache=cache, **options) for page in pages]
+
+def _build_chunk(pages):
+    cache = _worker_state["cache"]
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    result = {"records": None, "cache_entries": [], "hits": 0, "misses": 0, "profile": None}
+    if _worker_state["profile"]:
+        with profiling.profile(_worker_state["track_memory"]) as profiler:
+            result["records"] = _build_pages(pages, _worker_state["options"], cache)
+        result["profile"] = profiler.stages
+    else:
+        result["records"] = _build_pages(pages, _worker_state["options"], cache)
+    if cache is not None:
+        result["cache_entries"] = cache.pop_new_entries()
+        result["hits"] = cache.hits - hits
+        result["misses"] = cache.misses - misses
+    return result
+
+def _write_records(records, writer):
+    for record in records:
+        if "html" in record:
+            writer.submit(record["path"], record.pop("html"))
+        else:
+            writer.record(record["path"], record["digest"], record["written"])
+    return records
+
+def _build(pages, options, workers, cache, cache_path, chunk_size, writer, profiler):
+    # Worker caches load the same file with the same limits as cache.
+    # Pages are rendered serially or on a process pool; every rendered page is
+    # handed to the writer, which hashes it and fans the writes out to threads.
+    if workers == 1 or len(pages) <= 1:
+        return [_write_records([build_page(page, cache=cache, **options)], writer)[0] for page in pages]
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    records = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            options, cache_path, (cache.max_entries, cache.max_bytes) if cache is not None else None,
+            profiler is not None, profiler is not None and profiler.track_memory,
+        ),
+    ) as executor:
+        futures = [executor.submit(_build_chunk, chunk) for chunk in chunk_pages(pages, workers, chunk_size)]
+        for future in as_completed(futures):
+            result = future.result()
+            records.extend(_write_records(result["records"], writer))
+            if cache is not None:
+                cache.merge(result["cache_entries"], result["hits"], result["misses"])
+            if result["profile"] is not None:
+                profiler.merge(result["profile"])
+    return records
+
+def _scan_pages(content_dir, pages, assets=None):
+    # One read per page yields its hash and, when assets are published, the
+    # images it references.
+    hashes = {}
+    for page in pages:
+        with open(os.path.join(content_dir, page), encoding="utf-8") as page_file:
+            markdown = page_file.read()
+        hashes[page] = source_hash(markdown)
+        if assets is not None:
+            assets.collect(page, markdown)
+    return hashes
+
+def generate_site(
+    content_dir, template, out_dir, workers=1, cache_path=None, chunk_size=None,
+    profile=False, track_memory=False, dependency_index_path=None, slots=None,
+    manifest_path=None, write_workers=8, publish_assets=False, asset_manifest_path=None, hardlink_assets=False,
+    heading_ids=False, search_index_path=None, cache_max_entries=DEFAULT_MAX_ENTRIES, cache_max_bytes=DEFAULT_MAX_BYTES,
+):
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    with open(template, encoding="utf-8") as template_file:
+        template_html = template_file.read()
+    pages = site_pages = find_pages(content_dir)
+    cache = BlockCache(cache_path, cache_max_entries, cache_max_bytes) if cache_path else None
+    search = SearchIndex(search_index_path) if search_index_path else None
+    index = None
+    removed = []
+    assets = None
+    asset_urls = None
+    if publish_assets:
+        assets = AssetPipeline(content_dir, out_dir, asset_manifest_path, write_workers, hardlink_assets)
+    if dependency_index_path or assets is not None:
+        page_hashes = _scan_pages(content_dir, pages, assets)
+    if assets is not None:
+        asset_urls = assets.publish()
+    with OutputWriter(out_dir, manifest_path, write_workers) as writer:
+        if dependency_index_path:
+            index = DependencyIndex(dependency_index_path)
+            template_hash = build_hash(
+                template_html, publish_assets=publish_assets, heading_ids=heading_ids,
+                search_index=search is not None, slots=slots,
+            )
+            pages, removed = index.plan(page_hashes, template_hash, content_dir, out_dir)
+            if search is not None:
+                # Pages without current postings are rendered to collect them.
+                search_hashes = search.page_hashes()
+                pages = sorted(set(pages).union(
+                    page for page, page_hash in page_hashes.items() if search_hashes.get(page) != page_hash
+                ))
+            index.template_hash = template_hash
+            for page in removed:
+                index.remove(page)
+                writer.remove(page_output_path(page, out_dir))
+        options = {
+            "content_dir": content_dir,
+            "template": Template(template_html),
+            "out_dir": out_dir,
+            "track_links": index is not None,
+            "slots": slots,
+            "asset_urls": asset_urls,
+            "heading_ids": heading_ids,
+            "search_hashes": search.page_hashes() if search is not None else None,
+            "output_digests": dict(writer.manifest),
+        }
+        build_args = (pages, options, workers, cache, cache_path, chunk_size, writer)
+        if profile:
+            with profiling.profile(track_memory) as profiler:
+                records = _build(*build_args, profiler)
+        else:
+            profiler = None
+            records = _build(*build_args, None)
+        if search is not None:
+            for record in records:
+                if "postings" in record:
+                    search.update(record["page"], record["hash"], record["postings"])
+            search.prune(set(site_pages))
+            search.write_shards(out_dir, writer)
+    result = {
+        "pages": len(records),
+        "written": [record["path"] for record in records],
+        "unchanged": sorted(writer.unchanged),
+    }
+    if index is not None:
+        for record in records:
+            index.record(record["page"], record["hash"], record["links"], record["images"])
+        index.refresh_assets(content_dir)
+        index.save()
+        result["removed"] = removed
+        result["broken_links"] = index.broken_links()
+    if assets is not None:
+        result["assets"] = {"copied": assets.copied, "unchanged": assets.unchanged, "missing": assets.missing}
+    if search is not None:
+        search.save()
+    if cache is not None:
+        cache.save()
+        result["cache"] = cache.stats()
+        result["cache_report"] = cache.report()
+    if profiler is not None:
+        result["profiler"] = profiler
+    return result
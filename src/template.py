@@ -0,0 +1,65 @@
+from block_types import BlockType, LargeBlock, iter_block_lines, iter_stream_blocks, parse_block
+from grammar import TEMPLATE_SLOT_PATTERN
+from markdown_parser import STREAM_BLOCK_LINES
+from textnode import inline_plain_text
+
+
+class Template:
+    def __init__(self, source):
+        # chunks[i] is the static text before slots[i]; the last chunk
+        # follows the final slot.
+        self.chunks = []
+        self.slots = []
+        self.placeholders = []
+        cursor = 0
+        for match in TEMPLATE_SLOT_PATTERN.finditer(source):
+            self.chunks.append(source[cursor:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group())
+            cursor = match.end()
+        self.chunks.append(source[cursor:])
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as template_file:
+            return cls(template_file.read())
+
+    def render(self, values):
+        # Slots without a value keep their placeholder text.
+        parts = [self.chunks[0]]
+        for slot, placeholder, chunk in zip(self.slots, self.placeholders, self.chunks[1:]):
+            parts.append(values.get(slot, placeholder))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def write(self, stream, values, writers):
+        # Like render, but slots in writers are filled by calling
+        # writers[slot](stream) so their content is never held as a string.
+        stream.write(self.chunks[0])
+        for slot, placeholder, chunk in zip(self.slots, self.placeholders, self.chunks[1:]):
+            if slot in writers:
+                writers[slot](stream)
+            else:
+                stream.write(values.get(slot, placeholder))
+            stream.write(chunk)
+
+
+def extract_title(markdown):
+    # Files are read with iter_stream_blocks, so a long block before the first
+    # heading is classified line by line instead of being joined in memory.
+    if isinstance(markdown, str):
+        blocks = iter_block_lines(markdown)
+    else:
+        blocks = iter_stream_blocks(markdown, STREAM_BLOCK_LINES)
+    for block, large_block in blocks:
+        if isinstance(large_block, LargeBlock):
+            if large_block.block_type != BlockType.HEADING:
+                continue
+            block = large_block.first_line
+        if not block.startswith("#"):
+            continue
+        parsed = parse_block(block)
+        if parsed.block_type == BlockType.HEADING:
+            # The visible heading text, as TocCollector lists it.
+            return inline_plain_text(parsed.text).strip()
+    return None
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from markdown_parser import markdown_to_html, markdown_to_html_node
+
+
+MARKDOWN = """
+# Title
+
+This is **bolded** paragraph
+
+- a list
+- with items
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.stats()["misses"], 3)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.stats()["hits"], 3)
+
+    def test_page_cache_only_rerenders_changed_blocks(self):
+        cache = BlockCache()
+        markdown_to_html(MARKDOWN, cache)
+        edited = MARKDOWN.replace("bolded", "edited")
+        self.assertIn("<b>edited</b>", markdown_to_html(edited, cache))
+        # page miss, two block hits and one block miss
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 2 + 4)
+
+    def test_eviction_limits(self):
+        cache = BlockCache(max_entries=2)
+        for i in range(3):
+            cache.put(cache.key(f"block {i}"), f"<p>{i}</p>")
+        self.assertIsNone(cache.get(cache.key("block 0")))
+        self.assertEqual(cache.evictions, 1)
+
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "<p>1</p>")
+        cache.put("b", "<p>2</p>")
+        self.assertEqual(list(cache.entries), ["b"])
+
+    def test_new_keys_tracked_only_on_request(self):
+        cache = BlockCache(max_entries=16)
+        for i in range(100):
+            cache.put(cache.key(f"block {i}"), f"<p>{i}</p>")
+        self.assertEqual(cache.new_keys, [])
+        self.assertEqual(cache.pop_new_entries(), [])
+
+        cache = BlockCache(max_entries=2, track_new=True)
+        for i in range(3):
+            cache.put(cache.key(f"block {i}"), f"<p>{i}</p>")
+        self.assertEqual([html for _, html in cache.pop_new_entries()], ["<p>1</p>", "<p>2</p>"])
+        self.assertEqual(cache.new_keys, [])
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "blocks.json")
+            cache = BlockCache(path)
+            markdown_to_html(MARKDOWN, cache)
+            cache.save()
+            reloaded = BlockCache(path)
+            self.assertEqual(reloaded.entries, cache.entries)
+            markdown_to_html(MARKDOWN, reloaded)
+            self.assertEqual(reloaded.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from dependency_graph import DependencyIndex, resolve_target
+from site_generator import generate_site
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.content = os.path.join(root, "content")
+        self.out_dir = os.path.join(root, "public")
+        self.index_path = os.path.join(root, "deps.json")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write("template.html", "{{ Content }}", root)
+        self.write("index.md", "[first](/blog/first) and [second](blog/second.html) ![logo](logo.png)")
+        self.write("blog/first.md", "back [home](../index)")
+        self.write("blog/second.md", "see [first](first.html)")
+        self.write("logo.png", "png")
+        self.write("about.md", "nothing links here")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text, root=None):
+        with open(os.path.join(root or self.content, name), "w") as out_file:
+            out_file.write(text)
+
+    def build(self):
+        return generate_site(self.content, self.template, self.out_dir, dependency_index_path=self.index_path)
+
+    def test_resolve_target(self):
+        self.assertEqual(resolve_target("blog/post.md", "../index"), "index.html")
+        self.assertEqual(resolve_target("blog/post.md", "../index.md"), "index.md")
+        self.assertEqual(resolve_target("blog/post.md", "/docs/"), "docs/index.html")
+        self.assertEqual(resolve_target("blog/post.md", "other#part"), "blog/other.html")
+        self.assertIsNone(resolve_target("index.md", "https://example.com/page"))
+        self.assertIsNone(resolve_target("index.md", "#top"))
+        self.assertEqual(resolve_target("blog/post.md", "img/a.png", is_page_link=False), "blog/img/a.png")
+
+    def test_selective_rebuild(self):
+        self.assertEqual(self.build()["pages"], 4)
+        self.assertEqual(self.build()["pages"], 0)
+
+        self.write("about.md", "changed")
+        self.assertEqual(self.build()["written"], [os.path.join(self.out_dir, "about.html")])
+
+        os.remove(os.path.join(self.content, "blog", "first.md"))
+        result = self.build()
+        self.assertEqual(result["removed"], ["blog/first.md"])
+        self.assertEqual(sorted(os.path.basename(path) for path in result["written"]), ["index.html", "second.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, "blog", "first.html")))
+        self.assertEqual(
+            result["broken_links"],
+            [("blog/second.md", "blog/first.html"), ("index.md", "blog/first.html")],
+        )
+
+        self.write("logo.png", "new png, different size")
+        result = self.build()
+        self.assertEqual([os.path.basename(path) for path in result["written"]], ["index.html"])
+
+    def test_index_persists(self):
+        self.build()
+        index = DependencyIndex(self.index_path)
+        self.assertEqual(index.pages["index.md"]["links"], ["blog/first.html", "blog/second.html"])
+        self.assertEqual(index.pages["index.md"]["assets"], ["logo.png"])
+        self.assertEqual(index.dependents({"index.html"}), {"blog/first.md"})
+
+    def test_source_links_are_broken(self):
+        self.write("about.md", "see [second](blog/second.md)")
+        result = self.build()
+        self.assertEqual(result["broken_links"], [("about.md", "blog/second.md")])
+        with open(os.path.join(self.out_dir, "about.html")) as page_file:
+            self.assertIn('href="blog/second.md"', page_file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from dev_server import SiteWatcher
+from site_generator import generate_site
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.content = os.path.join(root, "content")
+        self.out_dir = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        self.write(self.template, "<body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "first")
+        self.write(os.path.join(self.content, "other.md"), "other")
+        generate_site(self.content, self.template, self.out_dir)
+        self.watcher = SiteWatcher(self.content, self.template, self.out_dir, debounce=0.01)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, path, text, mtime_offset=0):
+        with open(path, "w") as out_file:
+            out_file.write(text)
+        if mtime_offset:
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+    def read(self, name):
+        with open(os.path.join(self.out_dir, name)) as page_file:
+            return page_file.read()
+
+    def test_poll_and_rebuild_only_changed(self):
+        self.assertIsNone(self.watcher.poll())
+        self.write(os.path.join(self.content, "index.md"), "second", mtime_offset=10**9)
+        os.remove(os.path.join(self.content, "other.md"))
+        changes = self.watcher.poll()
+        self.assertEqual(changes, {"template": False, "changed": ["index.md"], "removed": ["other.md"]})
+        inode = os.stat(os.path.join(self.out_dir, "index.html")).st_ino
+        self.assertEqual(self.watcher.rebuild(changes), (1, 1))
+        # Replaced by a rename rather than truncated in place.
+        self.assertNotEqual(os.stat(os.path.join(self.out_dir, "index.html")).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["index.html"])
+        self.assertEqual(self.read("index.html"), "<body><div><p>second</p></div></body>")
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, "other.html")))
+
+    def test_template_change_rebuilds_all(self):
+        self.write(self.template, "<main>{{ Content }}</main>", mtime_offset=10**9)
+        changes = self.watcher.poll()
+        self.assertTrue(changes["template"])
+        self.assertEqual(self.watcher.rebuild(changes), (2, 0))
+        self.assertEqual(self.read("other.html"), "<main><div><p>other</p></div></main>")
+
+    def test_failed_page_keeps_serving_and_is_retried(self):
+        self.write(os.path.join(self.content, "index.md"), "hello **unfinished", mtime_offset=10**9)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(self.watcher.rebuild(self.watcher.poll()), (0, 0))
+        self.assertIn("Failed to build index.md", output.getvalue())
+        self.assertEqual(self.read("index.html"), "<body><div><p>first</p></div></body>")
+
+        self.write(os.path.join(self.content, "index.md"), "hello **finished**", mtime_offset=2 * 10**9)
+        self.write(os.path.join(self.content, "other.md"), "edited", mtime_offset=2 * 10**9)
+        changes = self.watcher.poll()
+        self.assertEqual(self.watcher.rebuild(changes), (2, 0))
+        self.assertEqual(self.read("index.html"), "<body><div><p>hello <b>finished</b></p></div></body>")
+        self.assertEqual(self.watcher.failed, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
+import io
+import tempfile
+import tracemalloc
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
-from markdown_parser import markdown_to_html_node
+from block_cache import BlockCache
+from htmlnode import ATTRIBUTE_CACHE, HTMLNode, LeafNode, ParentNode, RawNode
+from markdown_parser import markdown_to_html, markdown_to_html_many, markdown_to_html_node, write_markdown_html
 
 
 class TestTextNode(unittest.TestCase):
@@ -38,6 +42,29 @@ class TestTextNode(unittest.TestCase):
         node = LeafNode(None, "Hello, world!")
         self.assertEqual(node.to_html(), "Hello, world!")
 
+    def test_escaping(self):
+        node = LeafNode("a", "Tom & <Jerry>", {"href": '/search?q="x"&page=2', "title": "it's"})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="/search?q=&quot;x&quot;&amp;page=2" title="it&#x27;s">Tom &amp; &lt;Jerry&gt;</a>',
+        )
+        self.assertEqual(LeafNode(None, "1 < 2").to_html(), "1 &lt; 2")
+        self.assertEqual(ParentNode("p", [RawNode("<b>kept</b>")]).to_html(), "<p><b>kept</b></p>")
+        self.assertEqual(
+            markdown_to_html('a < b [x & y](/q?a=1&b=2)\n\n```\nif a<b:\n```'),
+            '<div><p>a &lt; b <a href="/q?a=1&amp;b=2">x &amp; y</a></p><pre><code>if a&lt;b:\n</code></pre></div>',
+        )
+
+    def test_attribute_cache(self):
+        ATTRIBUTE_CACHE.clear()
+        for _ in range(3):
+            self.assertEqual(HTMLNode(props={"href": "/a"}).props_to_html(), ' href="/a"')
+        self.assertEqual(ATTRIBUTE_CACHE.stats()["hits"], 2)
+        self.assertEqual(HTMLNode(props={"data": ["x"]}).props_to_html(), " data=\"[&#x27;x&#x27;]\"")
+        self.assertEqual(HTMLNode(props={"checked": True}).props_to_html(), ' checked="True"')
+        self.assertEqual(HTMLNode(props={"checked": 1}).props_to_html(), ' checked="1"')
+        self.assertEqual(HTMLNode(props={"checked": 1.0}).props_to_html(), ' checked="1.0"')
+
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
         child_node2 = LeafNode("spa", "chil")
@@ -60,6 +87,27 @@ class TestTextNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
     )
         
+    def test_write_html_streams_chunks(self):
+        leaves = [LeafNode("li", f"item {i}") for i in range(3)]
+        parent_node = ParentNode("div", [ParentNode("ul", leaves, {"class": "list"})])
+        expected = '<div><ul class="list"><li>item 0</li><li>item 1</li><li>item 2</li></ul></div>'
+        buffer = io.StringIO()
+        parent_node.write_html(buffer, batch_size=2)
+        self.assertEqual(buffer.getvalue(), expected)
+        self.assertEqual("".join(parent_node.iter_html()), expected)
+        self.assertEqual(parent_node.to_html(), expected)
+
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", [])]).to_html()
+
+    def test_deep_nesting_to_html(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+
     def test_paragraphs(self):
         md = """
     This is **bolded** paragraph
@@ -77,6 +125,56 @@ class TestTextNode(unittest.TestCase):
             "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p><p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>",
         )
 
+    def test_markdown_to_html_node_from_file(self):
+        md = "This is **bolded** paragraph\n\n- a list\n- with items\n"
+        node = markdown_to_html_node(io.StringIO(md))
+        self.assertEqual(node.to_html(), markdown_to_html_node(md).to_html())
+
+    def test_write_markdown_html_streams_large_blocks(self):
+        items = "\n".join(f"- item **{i}**" for i in range(3000))
+        code = "```python\n" + "\n".join(f"x_{i} = {i}" for i in range(3000)) + "\n  \n```"
+        ordered = "\n".join(f"{i}. step {i}" for i in range(1, 3001))
+        md = f"# Dump\n\n{items}\n\n{code}\n\n{ordered}\n\n> a\n> quote\n"
+        expected = markdown_to_html(md)
+        with tempfile.TemporaryFile("w+") as text_file:
+            text_file.write(md)
+            for source in (md, text_file):
+                text_file.seek(0)
+                buffer = io.StringIO()
+                write_markdown_html(source, buffer, batch_size=16)
+                self.assertEqual(buffer.getvalue(), expected)
+
+    def test_write_markdown_html_memory_does_not_grow_with_list_size(self):
+        class Discard:
+            def write(self, text):
+                pass
+
+        peaks = []
+        for count in (5000, 50000):
+            with tempfile.TemporaryFile("w+") as text_file:
+                text_file.write("\n".join(f"- item {i}" for i in range(count)))
+                text_file.seek(0)
+                tracemalloc.start()
+                write_markdown_html(text_file, Discard())
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 2)
+
+    def test_markdown_to_html_many(self):
+        docs = ["# Title", "Some **bold** text", "- a\n- b", "```\ncode\n```"]
+        expected = [(index, markdown_to_html_node(doc).to_html()) for index, doc in enumerate(docs)]
+        self.assertEqual(list(markdown_to_html_many(docs)), expected)
+        self.assertEqual(list(markdown_to_html_many(zip("abcd", docs)))[1], ("b", expected[1][1]))
+        self.assertEqual(list(markdown_to_html_many(docs, workers=2, chunk_size=1)), expected)
+        unordered = markdown_to_html_many(docs * 3, ordered=False, workers=2, chunk_size=2)
+        self.assertEqual(sorted(unordered), sorted((i, expected[i % 4][1]) for i in range(12)))
+
+        cache = BlockCache()
+        self.assertEqual(list(markdown_to_html_many(docs, workers=2, cache=cache, chunk_size=1)), expected)
+        self.assertEqual((cache.hits, cache.misses, len(cache.entries)), (0, 4, 4))
+        self.assertEqual(list(markdown_to_html_many(docs, workers=2, cache=cache, chunk_size=1)), expected)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+
     def test_codeblock(self):
         md = """
     ```
@@ -0,0 +1,52 @@
+import unittest
+
+from inline_cache import LRUCache, configure_inline_cache, inline_cache_stats
+from markdown_parser import markdown_to_html_node, text_to_children
+from textnode import TextNode, TextType, text_to_textnodes
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(enabled=False)
+
+    def test_lru_eviction(self):
+        cache = LRUCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_disabled_by_default(self):
+        text_to_textnodes("plain")
+        self.assertEqual(inline_cache_stats(), {})
+
+    def test_cached_results_are_copies(self):
+        configure_inline_cache(capacity=8)
+        first = text_to_textnodes("a **b** c")
+        first[0].text = "changed"
+        first.append(TextNode("extra", TextType.NORMAL))
+        self.assertEqual(
+            text_to_textnodes("a **b** c"),
+            [TextNode("a ", TextType.NORMAL), TextNode("b", TextType.BOLD), TextNode(" c", TextType.NORMAL)],
+        )
+        children = text_to_children("repeated _line_")
+        children[0].value = "HACKED"
+        children.clear()
+        self.assertEqual(text_to_children("repeated _line_")[0].to_html(), "repeated <i>line</i>")
+        stats = inline_cache_stats()
+        self.assertEqual(stats["textnodes"]["hits"], 1)
+        self.assertEqual(stats["children"]["hits"], 1)
+
+    def test_cached_render_matches(self):
+        md = "- same item\n- same item\n- same item\n\nsame item"
+        expected = markdown_to_html_node(md).to_html()
+        configure_inline_cache(capacity=8)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        # The plain paragraph takes the fast path and never reaches the cache.
+        self.assertEqual(inline_cache_stats()["children"]["hits"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
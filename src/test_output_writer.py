@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from output_writer import OutputWriter, atomic_write
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.directory.name, "public")
+        self.manifest = os.path.join(self.directory.name, "manifest.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_atomic_write_leaves_no_temp_files(self):
+        path = os.path.join(self.out, "blog", "post.html")
+        atomic_write(path, "<p>one</p>")
+        atomic_write(path, "<p>two</p>")
+        with open(path) as page_file:
+            self.assertEqual(page_file.read(), "<p>two</p>")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["post.html"])
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        pages = {os.path.join(self.out, f"page{i}.html"): f"<p>{i}</p>" for i in range(20)}
+        with OutputWriter(self.out, self.manifest, workers=4) as writer:
+            for path, html in pages.items():
+                writer.submit(path, html)
+        self.assertEqual(len(writer.written), 20)
+        changed = os.path.join(self.out, "page3.html")
+        pages[changed] = "<p>changed</p>"
+        with OutputWriter(self.out, self.manifest, workers=4) as writer:
+            for path, html in pages.items():
+                writer.submit(path, html)
+        self.assertEqual(writer.written, [changed])
+        self.assertEqual(len(writer.unchanged), 19)
+        with open(changed) as page_file:
+            self.assertEqual(page_file.read(), "<p>changed</p>")
+
+    def test_deleted_output_is_rewritten(self):
+        path = os.path.join(self.out, "index.html")
+        with OutputWriter(self.out, self.manifest) as writer:
+            writer.write(path, "<p>hi</p>")
+        os.remove(path)
+        with OutputWriter(self.out, self.manifest) as writer:
+            self.assertTrue(writer.write(path, "<p>hi</p>"))
+
+    def test_write_errors_surface_on_close(self):
+        blocker = os.path.join(self.directory.name, "file")
+        atomic_write(blocker, "")
+        writer = OutputWriter(blocker, workers=2)
+        writer.submit(os.path.join(blocker, "page.html"), "<p></p>")
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+import profiling
+from block_cache import BlockCache
+from markdown_parser import markdown_to_html, markdown_to_html_node
+from toc import TocCollector
+
+
+MARKDOWN = "# Title\n\nA **bold** paragraph\n\n- one\n- two\n\n```\ncode\n```"
+
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_records_stages_per_block_type(self):
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        with profiling.profile() as profiler:
+            with profiling.page_label("index.md"):
+                self.assertEqual(markdown_to_html(MARKDOWN), expected)
+        self.assertIsNone(profiling.active_profiler())
+        totals = profiler.totals()
+        self.assertEqual(totals["parse_block"][0], 4)
+        for name in ("render:heading", "render:paragraph", "render:unordered_list", "render:code", "to_html"):
+            self.assertEqual(totals[name][0], 1)
+        self.assertNotIn("render:paragraph_plain", totals)
+        self.assertIn("index.md", profiler.to_dict()["pages"])
+
+    def test_profile_with_cache_and_memory(self):
+        cache = BlockCache()
+        markdown_to_html_node(MARKDOWN, cache)
+        events = []
+        with profiling.profile(track_memory=True) as profiler:
+            profiler.add_callback(lambda page, name, seconds, allocated: events.append(name))
+            markdown_to_html_node(MARKDOWN, cache)
+        self.assertEqual(events, ["split_blocks"] + ["cache_lookup"] * 4)
+
+    def test_profile_records_plain_paragraphs(self):
+        with profiling.profile() as profiler:
+            markdown_to_html("# Title\n\nplain text\n\nmore plain text", BlockCache())
+        totals = profiler.totals()
+        self.assertEqual(totals["render:paragraph_plain"][0], 2)
+        self.assertEqual(totals["parse_block"][0], 1)
+
+    def test_profile_with_collectors(self):
+        collector = TocCollector()
+        expected = markdown_to_html(MARKDOWN, collectors=[TocCollector()])
+        with profiling.profile() as profiler:
+            self.assertEqual(markdown_to_html(MARKDOWN, collectors=[collector]), expected)
+        totals = profiler.totals()
+        self.assertEqual(totals["parse_block"][0], 4)
+        self.assertEqual(totals["collect"][0], 4)
+        self.assertEqual(totals["render:heading"][0], 1)
+        self.assertEqual(collector.entries, [(1, "Title", "title")])
+
+    def test_exports(self):
+        with profiling.profile() as profiler:
+            markdown_to_html(MARKDOWN)
+        with tempfile.TemporaryDirectory() as directory:
+            profiler.write_json(os.path.join(directory, "profile.json"))
+            stats_path = os.path.join(directory, "profile.prof")
+            profiler.dump_stats(stats_path)
+            stats = pstats.Stats(stats_path)
+            self.assertEqual(stats.total_calls, sum(calls for calls, _, _ in profiler.stages.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
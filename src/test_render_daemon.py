@@ -0,0 +1,69 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from inline_cache import configure_inline_cache
+from markdown_parser import markdown_to_html
+from render_daemon import RenderError, RenderServer, render_remote
+
+
+class TestRenderDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "render.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start_server(self):
+        server = RenderServer(self.path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            configure_inline_cache(enabled=False)
+
+        self.addCleanup(stop)
+        return server
+
+    def test_renders_like_markdown_to_html(self):
+        self.start_server()
+        markdown = "# Title\n\nSome **bold** text with a [link](/a)\n\n- one\n- two"
+        self.assertEqual(render_remote(self.path, markdown), markdown_to_html(markdown))
+        self.assertEqual(render_remote(self.path, markdown), markdown_to_html(markdown))
+        with self.assertRaises(RenderError):
+            render_remote(self.path, "an **unmatched delimiter")
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        self.start_server()
+        self.assertEqual(render_remote(self.path, "hello"), "<div><p>hello</p></div>")
+        with self.assertRaises(RenderError):
+            RenderServer(self.path)
+
+    def test_empty_and_undecodable_requests(self):
+        server = self.start_server()
+        errors = []
+        server.handle_error = lambda request, address: errors.append(address)
+        self.assertEqual(render_remote(self.path, ""), "")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(self.path)
+            client.sendall(b"\xff\xfe")
+            client.shutdown(socket.SHUT_WR)
+            response = client.recv(4096)
+        self.assertTrue(response.startswith(b"error\n"))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.connect(self.path)
+        self.assertEqual(render_remote(self.path, "hello"), "<div><p>hello</p></div>")
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
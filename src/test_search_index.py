@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from markdown_parser import markdown_to_html
+from search_index import SearchCollector
+from site_generator import generate_site
+from toc import TocCollector, slugify
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = self.directory.name
+        self.content = os.path.join(root, "content")
+        self.out_dir = os.path.join(root, "public")
+        self.index_path = os.path.join(root, "search.json")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, "w") as template_file:
+            template_file.write("<nav>{{ Toc }}</nav>{{ Content }}")
+        self.write("index.md", "Welcome home\n\n## Getting started\n\nInstall the **tool**")
+        self.write("about.md", "# About\n\nThe tool was written [here](/x.html)")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.content, name), "w") as page_file:
+            page_file.write(text)
+
+    def read_shard(self, name):
+        with open(os.path.join(self.out_dir, "search", f"{name}.json")) as shard_file:
+            return json.load(shard_file)
+
+    def test_toc_anchors_are_unique_and_cached_separately(self):
+        self.assertEqual(slugify("The **big** one!"), "the-big-one")
+        markdown = "# Intro\n\ntext\n\n# Intro"
+        cache = BlockCache()
+        toc = TocCollector()
+        html = markdown_to_html(markdown, cache, (toc,))
+        self.assertEqual(html, '<div><h1 id="intro">Intro</h1><p>text</p><h1 id="intro-1">Intro</h1></div>')
+        self.assertEqual(toc.entries, [(1, "Intro", "intro"), (1, "Intro", "intro-1")])
+        self.assertEqual(markdown_to_html(markdown, cache), "<div><h1>Intro</h1><p>text</p><h1>Intro</h1></div>")
+        self.assertEqual(
+            toc.to_html(),
+            '<ul class="toc"><li class="toc-h1"><a href="#intro">Intro</a></li>'
+            '<li class="toc-h1"><a href="#intro-1">Intro</a></li></ul>',
+        )
+
+    def test_postings_point_at_sections(self):
+        toc = TocCollector()
+        search = SearchCollector()
+        markdown_to_html("Intro _tool_\n\n## Usage\n\n- run the tool", collectors=(toc, search))
+        self.assertEqual(search.postings["tool"], ["", "usage"])
+        self.assertEqual(search.postings["usage"], ["usage"])
+
+    def test_site_index_is_incremental(self):
+        result = generate_site(
+            self.content, self.template, self.out_dir, search_index_path=self.index_path, heading_ids=True,
+        )
+        with open(os.path.join(self.out_dir, "index.html")) as page_file:
+            self.assertIn('<nav><ul class="toc"><li class="toc-h2"><a href="#getting-started">', page_file.read())
+        self.assertEqual(self.read_shard("t")["tool"], [["/about.html", "about"], ["/index.html", "getting-started"]])
+        self.assertEqual(len(result["unchanged"]), 0)
+
+        self.write("about.md", "# About\n\nNothing to see")
+        os.remove(os.path.join(self.content, "index.md"))
+        self.write("new.md", "a fresh tool")
+        result = generate_site(self.content, self.template, self.out_dir, search_index_path=self.index_path)
+        self.assertEqual(self.read_shard("t")["tool"], [["/new.html", ""]])
+        self.assertEqual(self.read_shard("n")["nothing"], [["/about.html", "about"]])
+        self.assertFalse(os.path.exists(os.path.join(self.out_dir, "search", "w.json")))
+
+        # Unchanged pages keep their stored postings instead of being collected again.
+        with open(self.index_path) as index_file:
+            stored = json.load(index_file)
+        stored["pages"]["new.md"]["postings"] = {"cached": [""]}
+        with open(self.index_path, "w") as index_file:
+            json.dump(stored, index_file)
+        generate_site(self.content, self.template, self.out_dir, search_index_path=self.index_path)
+        self.assertEqual(self.read_shard("c")["cached"], [["/new.html", ""]])
+
+    def test_toc_slot_is_empty_without_toc(self):
+        generate_site(self.content, self.template, self.out_dir)
+        with open(os.path.join(self.out_dir, "index.html")) as page_file:
+            self.assertTrue(page_file.read().startswith("<nav></nav><div><p>Welcome home</p>"))
+        # The search index still needs heading anchors, but not the TOC.
+        generate_site(self.content, self.template, self.out_dir, search_index_path=self.index_path, slots={"Toc": "mine"})
+        with open(os.path.join(self.out_dir, "index.html")) as page_file:
+            html = page_file.read()
+        self.assertTrue(html.startswith("<nav>mine</nav>"))
+        self.assertIn('<h2 id="getting-started">', html)
+
+    def test_enabling_options_rerenders_indexed_pages(self):
+        deps = os.path.join(self.directory.name, "deps.json")
+        build = lambda **options: generate_site(
+            self.content, self.template, self.out_dir, dependency_index_path=deps, **options,
+        )
+        build()
+        self.assertEqual(build()["pages"], 0)
+        self.assertEqual(build(heading_ids=True)["pages"], 2)
+        with open(os.path.join(self.out_dir, "index.html")) as page_file:
+            self.assertIn('<h2 id="getting-started">', page_file.read())
+
+        # Dropping the stored postings forces the page to be collected again.
+        self.assertEqual(build(heading_ids=True, search_index_path=self.index_path)["pages"], 2)
+        self.assertEqual(self.read_shard("t")["tool"], [["/about.html", "about"], ["/index.html", "getting-started"]])
+        with open(self.index_path) as index_file:
+            stored = json.load(index_file)
+        del stored["pages"]["about.md"]
+        with open(self.index_path, "w") as index_file:
+            json.dump(stored, index_file)
+        result = build(heading_ids=True, search_index_path=self.index_path)
+        self.assertEqual(result["written"], [os.path.join(self.out_dir, "about.html")])
+        self.assertEqual(build(heading_ids=True, search_index_path=self.index_path, slots={"X": "y"})["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
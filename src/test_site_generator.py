@@ -0,0 +1,193 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from async_build import build_site
+from site_generator import extract_title, generate_site
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+PAGES = {
+    "index.md": "# Home\n\nWelcome to **the** site with an ![logo](/logo.png)",
+    "blog/first.md": "# First post\n\n- one\n- two",
+    "blog/second.md": "Just a paragraph",
+}
+
+
+class TestSiteGenerator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.content = os.path.join(self.root, "content")
+        for page, markdown in PAGES.items():
+            path = os.path.join(self.content, page)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as page_file:
+                page_file.write(markdown)
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as template_file:
+            template_file.write(TEMPLATE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_output(self, out_dir):
+        outputs = {}
+        for page in PAGES:
+            with open(os.path.join(out_dir, page.replace(".md", ".html"))) as page_file:
+                outputs[page] = page_file.read()
+        return outputs
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("some text\n\n# The title \n\n## sub"), "The title")
+        self.assertEqual(extract_title("```\n# not a title\n```\n\n## Sub title"), "Sub title")
+        self.assertIsNone(extract_title("#hashtag-only text"))
+        self.assertEqual(extract_title("# Hello **world** & [co](/co)\nagain"), "Hello world & co again")
+
+    def test_extract_title_from_file_does_not_join_long_blocks(self):
+        with tempfile.TemporaryFile("w+") as page_file:
+            page_file.write("```\n" + "x = 1\n" * 200_000 + "```\n\n# Late title\n")
+            page_file.seek(0)
+            tracemalloc.start()
+            self.assertEqual(extract_title(page_file), "Late title")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.assertLess(peak, 512 * 1024)
+
+    def test_serial_build(self):
+        out_dir = os.path.join(self.root, "public")
+        result = generate_site(self.content, self.template, out_dir, workers=1)
+        self.assertEqual(result["pages"], 3)
+        outputs = self.read_output(out_dir)
+        self.assertEqual(
+            outputs["blog/first.md"],
+            "<html><title>First post</title><body><div><h1>First post</h1><ul><li>one</li><li>two</li></ul></div></body></html>",
+        )
+        self.assertIn('<img src="/logo.png" alt="logo"></img>', outputs["index.md"])
+        with open(os.path.join(self.content, "index.md"), "w") as page_file:
+            page_file.write("# Hello **world** & co")
+        generate_site(self.content, self.template, out_dir)
+        self.assertIn("<title>Hello world &amp; co</title>", self.read_output(out_dir)["index.md"])
+
+    def test_parallel_build_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        parallel_dir = os.path.join(self.root, "parallel")
+        cache_path = os.path.join(self.root, "cache.json")
+        generate_site(self.content, self.template, serial_dir, workers=1)
+        result = generate_site(self.content, self.template, parallel_dir, workers=2, chunk_size=1, cache_path=cache_path)
+        self.assertEqual(self.read_output(serial_dir), self.read_output(parallel_dir))
+        self.assertEqual(result["cache"]["hits"], 0)
+        result = generate_site(
+            self.content, self.template, parallel_dir, workers=2, chunk_size=1, cache_path=cache_path, profile=True,
+        )
+        self.assertEqual(result["cache"]["hits"], 3)
+        self.assertEqual(set(result["profiler"].to_dict()["pages"]), set(PAGES))
+
+    def test_cache_limits_apply_to_every_cache(self):
+        cache_path = os.path.join(self.root, "cache.json")
+        for workers in (1, 2):
+            result = generate_site(
+                self.content, self.template, os.path.join(self.root, "public"), workers=workers, chunk_size=1,
+                cache_path=cache_path, cache_max_entries=2,
+            )
+            self.assertEqual(result["cache"]["entries"], 2)
+            self.assertGreater(result["cache"]["evictions"], 0)
+        result = build_site(
+            self.content, self.template, os.path.join(self.root, "async"), parse_workers=2, cache_path=cache_path,
+            cache_max_bytes=60,
+        )
+        self.assertLessEqual(result["cache"]["bytes"], 60)
+
+    def test_large_pages_are_streamed(self):
+        serial_dir = os.path.join(self.root, "serial")
+        streamed_dir = os.path.join(self.root, "streamed")
+        manifest = os.path.join(self.root, "manifest.json")
+        generate_site(self.content, self.template, serial_dir)
+        with mock.patch("site_generator.STREAM_PAGE_BYTES", 0):
+            result = generate_site(self.content, self.template, streamed_dir, workers=2, manifest_path=manifest)
+        self.assertEqual(self.read_output(serial_dir), self.read_output(streamed_dir))
+        self.assertEqual(len(result["written"]), 3)
+        result = generate_site(self.content, self.template, streamed_dir, manifest_path=manifest)
+        self.assertEqual(len(result["unchanged"]), 3)
+
+        index_path = os.path.join(streamed_dir, "index.html")
+        inode = os.stat(index_path).st_ino
+        with mock.patch("site_generator.STREAM_PAGE_BYTES", 0):
+            result = generate_site(self.content, self.template, streamed_dir, manifest_path=manifest)
+            self.assertEqual(len(result["unchanged"]), 3)
+            self.assertEqual(os.stat(index_path).st_ino, inode)
+            self.assertEqual([name for name in os.listdir(streamed_dir) if name.startswith(".tmp-")], [])
+            with open(os.path.join(self.content, "index.md"), "a") as page_file:
+                page_file.write(" more")
+            result = generate_site(self.content, self.template, streamed_dir, manifest_path=manifest)
+            self.assertEqual(len(result["unchanged"]), 2)
+            self.assertNotEqual(os.stat(index_path).st_ino, inode)
+
+    def test_published_images_use_content_hash_names(self):
+        out_dir = os.path.join(self.root, "public")
+        cache_path = os.path.join(self.root, "cache.json")
+        manifest = os.path.join(self.root, "assets.json")
+        with open(os.path.join(self.content, "logo.png"), "wb") as image_file:
+            image_file.write(b"first logo")
+        build = lambda: generate_site(
+            self.content, self.template, out_dir, workers=2, chunk_size=1, cache_path=cache_path,
+            publish_assets=True, asset_manifest_path=manifest,
+        )
+        result = build()
+        self.assertEqual(result["assets"], {"copied": ["logo.png"], "unchanged": [], "missing": []})
+        first = self.read_output(out_dir)["index.md"]
+        self.assertRegex(first, r'<img src="/logo\.[0-9a-f]{12}\.png" alt="logo"></img>')
+        self.assertEqual(build()["assets"]["unchanged"], ["logo.png"])
+        with open(os.path.join(self.content, "logo.png"), "wb") as image_file:
+            image_file.write(b"second, longer logo")
+        self.assertEqual(build()["assets"]["copied"], ["logo.png"])
+        second = self.read_output(out_dir)["index.md"]
+        self.assertNotEqual(first, second)
+        src = second.split('src="/', 1)[1].split('"', 1)[0]
+        with open(os.path.join(out_dir, src), "rb") as image_file:
+            self.assertEqual(image_file.read(), b"second, longer logo")
+
+    def test_publishing_assets_rerenders_indexed_pages(self):
+        out_dir = os.path.join(self.root, "public")
+        deps = os.path.join(self.root, "deps.json")
+        with open(os.path.join(self.content, "logo.png"), "wb") as image_file:
+            image_file.write(b"logo")
+        generate_site(self.content, self.template, out_dir, dependency_index_path=deps)
+        self.assertEqual(generate_site(self.content, self.template, out_dir, dependency_index_path=deps)["pages"], 0)
+        result = generate_site(self.content, self.template, out_dir, dependency_index_path=deps, publish_assets=True)
+        self.assertEqual(result["pages"], 3)
+        self.assertRegex(self.read_output(out_dir)["index.md"], r'src="/logo\.[0-9a-f]{12}\.png"')
+
+        # A changed image re-renders only the pages that show it.
+        with open(os.path.join(self.content, "logo.png"), "wb") as image_file:
+            image_file.write(b"new logo, longer")
+        result = generate_site(self.content, self.template, out_dir, dependency_index_path=deps, publish_assets=True)
+        self.assertEqual(result["written"], [os.path.join(out_dir, "index.html")])
+        src = self.read_output(out_dir)["index.md"].split('src="/', 1)[1].split('"', 1)[0]
+        with open(os.path.join(out_dir, src), "rb") as image_file:
+            self.assertEqual(image_file.read(), b"new logo, longer")
+
+    def test_async_build_matches_serial(self):
+        serial_dir = os.path.join(self.root, "serial")
+        async_dir = os.path.join(self.root, "async")
+        generate_site(self.content, self.template, serial_dir, workers=1)
+        cache_path = os.path.join(self.root, "cache.json")
+        result = build_site(self.content, self.template, async_dir, readers=2, writers=2, queue_size=1, cache_path=cache_path)
+        self.assertEqual(result["pages"], 3)
+        self.assertEqual(self.read_output(serial_dir), self.read_output(async_dir))
+        result = build_site(self.content, self.template, async_dir, parse_workers=2, cache_path=cache_path)
+        self.assertEqual(self.read_output(serial_dir), self.read_output(async_dir))
+        self.assertEqual(result["cache"]["misses"], 0)
+
+    def test_async_build_propagates_errors(self):
+        with open(os.path.join(self.content, "broken.md"), "w") as page_file:
+            page_file.write("this **is unmatched")
+        with self.assertRaises(Exception):
+            build_site(self.content, self.template, os.path.join(self.root, "out"))
+
+
+if __name__ == "__main__":
+    unittest.main()
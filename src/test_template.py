@@ -0,0 +1,26 @@
+import unittest
+
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main>{{ Footer }}")
+        self.assertEqual(template.chunks, ["<title>", "</title><main>", "</main>", ""])
+        self.assertEqual(template.slots, ["Title", "Content", "Footer"])
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Title }}</p>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<div>{{ Title }}</div>"}),
+            "<h1>Hi</h1><div>{{ Title }}</div><p>Hi</p>",
+        )
+
+    def test_missing_slot_keeps_placeholder(self):
+        template = Template("{{ Content }} {{ Unknown }}")
+        self.assertEqual(template.render({"Content": "x"}), "x {{ Unknown }}")
+        self.assertEqual(Template("no slots").render({}), "no slots")
+
+
+if __name__ == "__main__":
+    unittest.main()
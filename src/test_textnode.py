@@ -1,8 +1,12 @@
+import io
+import mmap
+import tempfile
 import unittest
 
 from textnode import *
 from htmlnode import LeafNode, HTMLNode, ParentNode
 from block_types import *
+from grammar import escape_html, find_inline_links
 
 class TestTextNode(unittest.TestCase):
     def test_eq(self):
@@ -41,14 +45,11 @@ class TestTextNode(unittest.TestCase):
             TextNode("This text ", TextType.NORMAL),
             TextNode("has bold", TextType.BOLD),
             TextNode(" in it", TextType.NORMAL),
-            TextNode("", TextType.NORMAL),
             TextNode("everything is just bold", TextType.BOLD),
-            TextNode("", TextType.NORMAL),
             TextNode("This ", TextType.NORMAL),
             TextNode("is a test", TextType.BOLD),
             TextNode(" with multiple ", TextType.NORMAL),
             TextNode("bold place", TextType.BOLD),
-            TextNode("", TextType.NORMAL),
             TextNode("Wow italic", TextType.ITALIC)
         ])
         self.assertRaises(Exception, split_nodes_delimiter, wrong_list, "**", TextType.BOLD)
@@ -73,6 +74,14 @@ class TestTextNode(unittest.TestCase):
         )
         self.assertListEqual([], nothing)
     
+    def test_inline_link_spans(self):
+        text = "see ![logo](/logo.png) and [home](/index.html)"
+        matches = list(find_inline_links(text))
+        self.assertEqual([match.span() for match in matches], [(4, 22), (27, 46)])
+        self.assertEqual(matches[0].group(1, 2), ("logo", "/logo.png"))
+        self.assertEqual(matches[1].group(3, 4), ("home", "/index.html"))
+        self.assertEqual(escape_html("a < b & c"), "a &lt; b &amp; c")
+
     def test_split_images(self):
         node = TextNode(
             "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and another ![second image](https://i.imgur.com/3elNhQu.png)",
@@ -119,7 +128,72 @@ class TestTextNode(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://boot.dev")
             ], new_nodes
        )
-        
+
+    def test_inline_engines_match(self):
+        texts = [
+            "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+            "**bold** then ![a](b)![c](d) and [x](y)[z](w)",
+            "plain text with no markup",
+            "`code with [link](url)` and _![img](src)_",
+            "****empty bold__ and [](x) ![]()",
+            "**a _b `c` [d](e)_ f** and _g_",
+            "",
+        ]
+        for text in texts:
+            self.assertListEqual(
+                text_to_textnodes(text, engine="split"),
+                text_to_textnodes(text, engine="scan"),
+            )
+            self.assertListEqual(
+                spans_to_textnodes(text, scan_inline_spans(text)),
+                text_to_textnodes(text, engine="scan"),
+            )
+        self.assertRaises(Exception, text_to_textnodes, "this **shouldnt work")
+        self.assertRaises(ValueError, text_to_textnodes, "text", engine="nope")
+
+    def test_inline_spans(self):
+        text = "a **b** [c](d) ![e](f)"
+        spans = scan_inline_spans(text)
+        self.assertEqual(len(spans), 6 * SPAN_WIDTH)
+        self.assertEqual(list(spans[15:20]), [9, 10, TEXT_TYPE_CODES[TextType.LINK], 12, 13])
+        self.assertListEqual(spans_to_textnodes(text, spans), text_to_textnodes(text, engine="split"))
+        self.assertEqual(
+            spans_to_html(text, spans),
+            "".join(text_node_to_html_node(node).to_html() for node in text_to_textnodes(text)),
+        )
+
+    def test_plain_text_fast_path(self):
+        for text in ("just words, a * star and ! bang", "1. not a list here"):
+            self.assertListEqual(text_to_textnodes(text), [TextNode(text, TextType.NORMAL)])
+            self.assertListEqual(text_to_textnodes(text), text_to_textnodes(text, engine="split"))
+            self.assertEqual(list(scan_inline_spans(text)), [0, len(text), TEXT_TYPE_CODES[TextType.NORMAL], -1, -1])
+        from markdown_parser import block_to_html_node, plain_paragraph_node
+        for block in ("plain\nprose here", "2 apples and 3 pears"):
+            self.assertEqual(plain_paragraph_node(block).to_html(), block_to_html_node(block).to_html())
+        for block in ("a **b**", "# heading", "- item", "1. item", "> quote", "```\ncode\n```"):
+            self.assertIsNone(plain_paragraph_node(block))
+
+    def test_no_empty_normal_fragments(self):
+        for engine in ("scan", "split"):
+            self.assertListEqual(
+                text_to_textnodes("**bold**_italic_", engine=engine),
+                [TextNode("bold", TextType.BOLD), TextNode("italic", TextType.ITALIC)],
+            )
+            self.assertListEqual(text_to_textnodes("", engine=engine), [])
+
+    def test_slots_and_shared_leaves(self):
+        node = TextNode("text", TextType.NORMAL)
+        with self.assertRaises(AttributeError):
+            node.extra = True
+        with self.assertRaises(AttributeError):
+            LeafNode("p", "text").extra = True
+        first = text_node_to_html_node(TextNode(" ", TextType.NORMAL))
+        self.assertIs(first, text_node_to_html_node(TextNode(" ", TextType.NORMAL)))
+        self.assertEqual(first.to_html(), " ")
+        with self.assertRaises(AttributeError):
+            first.value = "changed"
+        self.assertEqual(text_node_to_html_node(TextNode(" ", TextType.NORMAL)).to_html(), " ")
+
     def test_markdown_to_blocks(self):
         md = """
     This is **bolded** paragraph
@@ -140,6 +214,24 @@ class TestTextNode(unittest.TestCase):
             ],
         )
     
+    def test_iter_blocks_from_streams(self):
+        md = "# Title\n\n\n- one\n- two\n  \n\nplain\n   \ntext\n"
+        expected = [
+            ("# Title", BlockType.HEADING, (1, 1)),
+            ("- one\n- two", BlockType.UNORDERED_LIST, (4, 5)),
+            ("plain\n\ntext", BlockType.PARAGRAPH, (8, 10)),
+        ]
+        self.assertEqual(list(iter_blocks(md)), expected)
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), expected)
+        self.assertEqual(markdown_to_blocks(md), [block for block, _, _ in expected])
+        with tempfile.TemporaryFile() as source:
+            source.write(md.encode())
+            source.flush()
+            source.seek(0)
+            self.assertEqual(list(iter_blocks(source)), expected)
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(list(iter_blocks(mapped)), expected)
+
     def test_block_to_block_type(self):
         block_heading = "# This is a level 1 heading (biggest)\n## This is a level 2 heading\n### This is a level 3 heading\n#### This is a level 4 heading"
         block_code = "``` this is code blablabla ```"
@@ -155,5 +247,22 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(BlockType.ORDERED_LIST, block_to_block_type(block_ordered))
         self.assertEqual(BlockType.PARAGRAPH, block_to_block_type(block_paragraph))
 
+    def test_parse_block(self):
+        self.assertEqual(parse_block("## Sub **title**"), ParsedBlock(BlockType.HEADING, "Sub **title**", 2))
+        self.assertEqual(parse_block("```\nx = 1\n```"), ParsedBlock(BlockType.CODE, "x = 1\n"))
+        self.assertEqual(
+            parse_block(">first\n> second"),
+            ParsedBlock(BlockType.QUOTE, "first\nsecond", lines=["first", "second"]),
+        )
+        self.assertEqual(
+            parse_block("- one\n-  two"),
+            ParsedBlock(BlockType.UNORDERED_LIST, items=["one", "two"]),
+        )
+        self.assertEqual(
+            parse_block("1. one\n2. two\n3. three"),
+            ParsedBlock(BlockType.ORDERED_LIST, items=["one", "two", "three"]),
+        )
+        self.assertEqual(parse_block("1. one\n3. three"), ParsedBlock(BlockType.PARAGRAPH, "1. one\n3. three"))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
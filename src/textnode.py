@@ -1,6 +1,17 @@
-import re
+from array import array
+from contextlib import contextmanager
 from enum import Enum
-from htmlnode import LeafNode
+from htmlnode import FrozenLeafNode, LeafNode
+from inline_cache import textnode_cache
+from grammar import (
+    escape_attribute,
+    escape_html,
+    find_images,
+    find_inline_links,
+    find_links,
+    has_html_special,
+    has_inline_markup,
+)
 
 
 class TextType(Enum):
@@ -12,6 +23,8 @@ class TextType(Enum):
     IMAGE =  "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -29,9 +42,46 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
+# Separators that show up between almost every pair of inline elements share
+# one frozen leaf each.
+SHARED_NORMAL_LEAVES = {
+    text: FrozenLeafNode(None, text, None)
+    for text in (" ", ", ", ". ", ": ", "; ", " - ", " and ", " or ", " the ", " a ", "(", ")")
+}
+
+# The image url map of the page being rendered, or None. Image sources are
+# looked up in it so assets can be published under content-hash names.
+_image_urls = None
+
+
+@contextmanager
+def image_urls(url_map):
+    global _image_urls
+    previous = _image_urls
+    _image_urls = url_map or None
+    try:
+        yield
+    finally:
+        _image_urls = previous
+
+def image_src(url):
+    if _image_urls is None:
+        return url
+    return _image_urls.get(url, url)
+
+def image_url_salt(text):
+    # Appended to cache keys so a block renders again when one of its images
+    # is published under a new name.
+    if _image_urls is None or "![" not in text:
+        return ""
+    return "".join(f"\0{url}\0{mapped}" for url, mapped in sorted(_image_urls.items()) if url in text)
+
 def text_node_to_html_node(text_node):
     match text_node.text_type:
         case TextType.NORMAL:
+            shared_leaf = SHARED_NORMAL_LEAVES.get(text_node.text)
+            if shared_leaf is not None:
+                return shared_leaf
             normal_leaf = LeafNode(None, text_node.text, None)
             return normal_leaf 
         case TextType.BOLD:
@@ -47,7 +97,7 @@ def text_node_to_html_node(text_node):
             link_leaf = LeafNode("a", text_node.text, {"href": text_node.url})
             return link_leaf
         case TextType.IMAGE:
-            image_leaf = LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            image_leaf = LeafNode("img", "", {"src": image_src(text_node.url), "alt": text_node.text})
             return image_leaf
         case _:
             raise Exception("Invalid TextType")
@@ -63,72 +113,204 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
             raise Exception(f"Unmatched delimiter '{delimiter}' in: {nodes.text}")
         for index, part in enumerate(split_delimiter):
             if index % 2 == 0:
-                split_list.append(TextNode(part, TextType.NORMAL))
+                if part:
+                    split_list.append(TextNode(part, TextType.NORMAL))
             else:
                 split_list.append(TextNode(part, text_type))
 
     return split_list
     
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return [match.groups() for match in find_images(text)]
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return [match.groups() for match in find_links(text)]
 
-def split_nodes_image(old_nodes):
+def split_nodes_matches(old_nodes, find_matches, text_type):
     split_list = []
     for nodes in old_nodes:
         if nodes.text_type != TextType.NORMAL:
             split_list.append(nodes)
             continue
-        extracted_image = extract_markdown_images(nodes.text)
-        if not extracted_image:
+        cursor = 0
+        for match in find_matches(nodes.text):
+            if match.start() > cursor:
+                split_list.append(TextNode(nodes.text[cursor:match.start()], TextType.NORMAL))
+            split_list.append(TextNode(match.group(1), text_type, match.group(2)))
+            cursor = match.end()
+        if cursor == 0:
             split_list.append(nodes)
-            continue
-        remaining_text = nodes.text
-        if remaining_text != "":
-            for alt, url in extracted_image:
-                split = remaining_text.split(f"![{alt}]({url})", 1)
-                if split[0] != "":
-                    split_list.append(TextNode(split[0], TextType.NORMAL))
-                split_list.append(TextNode(alt, TextType.IMAGE, url))
-                if len(split) > 1:
-                    remaining_text = split[1]
-                else:
-                    remaining_text = ""
-        if remaining_text:
-            split_list.append(TextNode(remaining_text, TextType.NORMAL))
+        elif cursor < len(nodes.text):
+            split_list.append(TextNode(nodes.text[cursor:], TextType.NORMAL))
     return split_list
 
+def split_nodes_image(old_nodes):
+    return split_nodes_matches(old_nodes, find_images, TextType.IMAGE)
+
 def split_nodes_link(old_nodes):
-    split_list = []
-    for nodes in old_nodes:
-        if nodes.text_type != TextType.NORMAL:
-            split_list.append(nodes)
+    return split_nodes_matches(old_nodes, find_links, TextType.LINK)
+
+INLINE_DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+TEXT_TYPES = tuple(TextType)
+TEXT_TYPE_CODES = {text_type: code for code, text_type in enumerate(TEXT_TYPES)}
+NORMAL_CODE = TEXT_TYPE_CODES[TextType.NORMAL]
+LINK_CODE = TEXT_TYPE_CODES[TextType.LINK]
+IMAGE_CODE = TEXT_TYPE_CODES[TextType.IMAGE]
+SPAN_WIDTH = 5
+INLINE_HTML_TAGS = {
+    TEXT_TYPE_CODES[TextType.BOLD]: ("<b>", "</b>"),
+    TEXT_TYPE_CODES[TextType.ITALIC]: ("<i>", "</i>"),
+    TEXT_TYPE_CODES[TextType.CODE]: ("<code>", "</code>"),
+}
+
+def scan_delimiter_pieces(text):
+    # (start, end, type_code) pieces of text after the bold, italic and code
+    # passes, in source order. Each pass splits only the NORMAL pieces of the
+    # one before, like the chained split passes, but keeps offsets instead of
+    # building nodes.
+    pieces = [(0, len(text), NORMAL_CODE)] if text else []
+    for delimiter, text_type in INLINE_DELIMITERS:
+        if delimiter in text:
+            pieces = _split_pieces(text, pieces, delimiter, TEXT_TYPE_CODES[text_type])
+    return pieces
+
+def _split_pieces(text, pieces, delimiter, type_code):
+    width = len(delimiter)
+    split = []
+    for piece in pieces:
+        start, end, code = piece
+        if code != NORMAL_CODE or text.find(delimiter, start, end) == -1:
+            split.append(piece)
             continue
-        extracted_link = extract_markdown_links(nodes.text)
-        if not extracted_link:
-            split_list.append(nodes)
+        parts = text[start:end].split(delimiter)
+        if len(parts) % 2 == 0:
+            raise Exception(f"Unmatched delimiter '{delimiter}' in: {text[start:end]}")
+        cursor = start
+        for index, part in enumerate(parts):
+            part_end = cursor + len(part)
+            if index % 2:
+                split.append((cursor, part_end, type_code))
+            elif part:
+                split.append((cursor, part_end, NORMAL_CODE))
+            cursor = part_end + width
+    return split
+
+def scan_inline_spans(text):
+    # Spans are flat (start, end, type_code, url_start, url_end) records
+    # pointing into text; url_start and url_end are -1 without a url. Nothing
+    # is sliced until the spans are turned into nodes or HTML.
+    if not has_inline_markup(text):
+        return array("q", (0, len(text), NORMAL_CODE, -1, -1)) if text else array("q")
+    spans = array("q")
+    check_links = "[" in text
+    for start, end, code in scan_delimiter_pieces(text):
+        if code == NORMAL_CODE and check_links and text.find("[", start, end) != -1:
+            _scan_links(text, start, end, spans)
+        else:
+            spans.extend((start, end, code, -1, -1))
+    return spans
+
+def _scan_links(text, start, end, spans):
+    cursor = start
+    for match in find_inline_links(text, start, end):
+        if match.start() > cursor:
+            spans.extend((cursor, match.start(), NORMAL_CODE, -1, -1))
+        if match.start(1) != -1:
+            spans.extend((match.start(1), match.end(1), IMAGE_CODE, match.start(2), match.end(2)))
+        else:
+            spans.extend((match.start(3), match.end(3), LINK_CODE, match.start(4), match.end(4)))
+        cursor = match.end()
+    if cursor < end:
+        spans.extend((cursor, end, NORMAL_CODE, -1, -1))
+
+def spans_to_textnodes(text, spans):
+    nodes = []
+    for index in range(0, len(spans), SPAN_WIDTH):
+        url_start = spans[index + 3]
+        nodes.append(TextNode(
+            text[spans[index]:spans[index + 1]],
+            TEXT_TYPES[spans[index + 2]],
+            text[url_start:spans[index + 4]] if url_start != -1 else None,
+        ))
+    return nodes
+
+def spans_to_html(text, spans):
+    # text is checked for &, < and > once; only then is each run escaped.
+    # Urls and alt text are attributes and always pass escape_attribute.
+    escape = has_html_special(text)
+    parts = []
+    for index in range(0, len(spans), SPAN_WIDTH):
+        value = text[spans[index]:spans[index + 1]]
+        type_code = spans[index + 2]
+        if type_code == NORMAL_CODE:
+            parts.append(escape_html(value) if escape else value)
+        elif type_code == LINK_CODE:
+            url = escape_attribute(text[spans[index + 3]:spans[index + 4]])
+            parts.append(f'<a href="{url}">{escape_html(value) if escape else value}</a>')
+        elif type_code == IMAGE_CODE:
+            url = escape_attribute(image_src(text[spans[index + 3]:spans[index + 4]]))
+            parts.append(f'<img src="{url}" alt="{escape_attribute(value)}"></img>')
+        else:
+            opening, closing = INLINE_HTML_TAGS[type_code]
+            parts.append(f"{opening}{escape_html(value) if escape else value}{closing}")
+    return "".join(parts)
+
+def scan_inline(text):
+    # Builds the nodes straight from the delimiter pieces; going through
+    # scan_inline_spans would slice every span a second time.
+    nodes = []
+    check_links = "[" in text
+    for start, end, code in scan_delimiter_pieces(text):
+        if code != NORMAL_CODE or not check_links or text.find("[", start, end) == -1:
+            nodes.append(TextNode(text[start:end], TEXT_TYPES[code]))
             continue
-        remaining_text = nodes.text
-        if remaining_text != "":
-            for text, url in extracted_link:
-                split = remaining_text.split(f"[{text}]({url})", 1)
-                if split[0] != "":
-                    split_list.append(TextNode(split[0], TextType.NORMAL))
-                split_list.append(TextNode(text, TextType.LINK, url))
-                if len(split) > 1:
-                    remaining_text = split[1]
-                else:
-                    remaining_text = ""
-        if remaining_text:
-            split_list.append(TextNode(remaining_text, TextType.NORMAL))
-    return split_list
+        cursor = start
+        for match in find_inline_links(text, start, end):
+            if match.start() > cursor:
+                nodes.append(TextNode(text[cursor:match.start()], TextType.NORMAL))
+            image_alt, image_url, link_text, link_url = match.groups()
+            if image_url is None:
+                nodes.append(TextNode(link_text, TextType.LINK, link_url))
+            else:
+                nodes.append(TextNode(image_alt, TextType.IMAGE, image_url))
+            cursor = match.end()
+        if cursor < end:
+            nodes.append(TextNode(text[cursor:end], TextType.NORMAL))
+    return nodes
 
-def text_to_textnodes(text):
+def split_textnodes(text):
     nodes = TextNode(text, TextType.NORMAL)
     nodes = split_nodes_delimiter([nodes], "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
     nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
     nodes = split_nodes_image(nodes)
     return split_nodes_link(nodes)
+
+INLINE_ENGINES = {
+    "scan": scan_inline,
+    "split": split_textnodes,
+}
+
+def text_to_textnodes(text, engine="scan", use_cache=True):
+    if engine not in INLINE_ENGINES:
+        raise ValueError(f"Unknown inline engine: {engine}")
+    if not has_inline_markup(text):
+        return [TextNode(text, TextType.NORMAL)] if text else []
+    cache = textnode_cache() if use_cache else None
+    if cache is None:
+        return INLINE_ENGINES[engine](text)
+    key = (engine, text)
+    nodes = cache.get(key)
+    if nodes is None:
+        nodes = tuple(INLINE_ENGINES[engine](text))
+        cache.put(key, nodes)
+    return [TextNode(node.text, node.text_type, node.url) for node in nodes]
+
+def inline_plain_text(text):
+    # The visible text of inline markdown: delimiters and urls dropped.
+    return "".join(node.text for node in text_to_textnodes(text.replace("\n", " ")))
@@ -0,0 +1,35 @@
+from block_types import BlockType
+from grammar import SLUG_SEPARATOR_PATTERN
+from htmlnode import LeafNode, ParentNode
+from textnode import inline_plain_text
+
+
+def slugify(text):
+    return SLUG_SEPARATOR_PATTERN.sub("-", text.lower()).strip("-") or "section"
+
+
+class TocCollector:
+    # Gives every heading of the page a unique id (slug, slug-1, slug-2, ...)
+    # and remembers (level, text, anchor) for the table of contents.
+    def __init__(self):
+        self.entries = []
+        self.seen = {}
+
+    def collect(self, parsed):
+        if parsed.block_type != BlockType.HEADING:
+            return
+        text = inline_plain_text(parsed.text).strip()
+        slug = slugify(text)
+        count = self.seen.get(slug, 0)
+        self.seen[slug] = count + 1
+        parsed.anchor = f"{slug}-{count}" if count else slug
+        self.entries.append((parsed.level, text, parsed.anchor))
+
+    def to_html_node(self):
+        return ParentNode("ul", [
+            ParentNode("li", [LeafNode("a", text, {"href": f"#{anchor}"})], {"class": f"toc-h{level}"})
+            for level, text, anchor in self.entries
+        ], {"class": "toc"})
+
+    def to_html(self):
+        return self.to_html_node().to_html() if self.entries else ""